@@ -0,0 +1,173 @@
+"""Пропускная способность входа, регистрации и авторизованных страниц.
+
+Запуск из корня репозитория:
+
+    python benchmarks/auth_throughput.py --iterations 150000 20000
+
+Для каждой конфигурации сессий (db — как раньше, cached_db и
+signed_cookies — с кэшем пользователя) и каждого числа итераций PBKDF2
+отдельный процесс на своей временной базе по очереди нагружает
+LoginView, users.views.SignUp и страницу about:author от авторизованного
+пользователя. Печатаются запросы в секунду и среднее число SQL-запросов.
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from wsgi_client import CSRF_TOKEN, call, session_cookie, setup_django
+
+CONFIGS = {
+    "db": {"SESSION_ENGINE": "db", "AUTH_USER_CACHE_TIMEOUT": "0"},
+    "cached_db": {
+        "SESSION_ENGINE": "cached_db",
+        "AUTH_USER_CACHE_TIMEOUT": "300",
+    },
+    "signed_cookies": {
+        "SESSION_ENGINE": "signed_cookies",
+        "AUTH_USER_CACHE_TIMEOUT": "300",
+    },
+}
+PASSWORD = "Yatube-bench-2024"
+PHASES = {
+    "login": "users:login",
+    "signup": "users:signup",
+    "page": "about:author",
+}
+
+
+def hammer(seconds, concurrency, action):
+    """Гоняет action в потоках seconds секунд, возвращает (успехи, ошибки,
+    время)."""
+    stats = {"ok": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        ok = errors = 0
+        while time.monotonic() < deadline:
+            if action():
+                ok += 1
+            else:
+                errors += 1
+        with lock:
+            stats["ok"] += ok
+            stats["errors"] += errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats["ok"], stats["errors"], time.monotonic() - started
+
+
+def run(args):
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Сниженная стоимость хэша живёт только в процессе бенчмарка.
+    settings.PASSWORD_HASH_ITERATIONS = args.iterations[0]
+
+    call_command("migrate", verbosity=0)
+
+    from django.db import connections
+    from yatube.wsgi import application
+
+    from core.metrics import registry
+    from posts.models import User
+
+    user = User.objects.create_user(username="bench", password=PASSWORD)
+    cookie = session_cookie(user)
+    connections.close_all()
+    csrf_cookie = f"csrftoken={CSRF_TOKEN}"
+    counter = itertools.count()
+
+    def login():
+        data = {"username": "bench", "password": PASSWORD}
+        return call(application, "POST", "/auth/login/", csrf_cookie,
+                    data) == 302
+
+    def signup():
+        username = f"user{next(counter)}"
+        data = {
+            "username": username,
+            "email": f"{username}@example.com",
+            "password1": PASSWORD,
+            "password2": PASSWORD,
+        }
+        return call(application, "POST", "/auth/signup/", csrf_cookie,
+                    data) == 302
+
+    def page():
+        return call(application, "GET", "/about/author/", cookie) == 200
+
+    actions = {"login": login, "signup": signup, "page": page}
+    result = {}
+    for phase, view in PHASES.items():
+        registry.clear()
+        ok, errors, elapsed = hammer(
+            args.seconds, args.concurrency, actions[phase]
+        )
+        queries = registry.get("yatube_db_queries", view)
+        result[phase] = {
+            "ok": ok,
+            "errors": errors,
+            "per_sec": round(ok / elapsed, 1),
+            "queries": round(queries.sum / queries.count, 1)
+            if queries else None,
+        }
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--configs", nargs="+", choices=CONFIGS, default=list(CONFIGS)
+    )
+    parser.add_argument(
+        "--iterations",
+        nargs="+",
+        type=int,
+        default=[150_000, 20_000],
+        help="Значения PASSWORD_HASH_ITERATIONS",
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--seconds", type=float, default=5, help="Длительность каждой фазы"
+    )
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args)
+        return
+    report = {}
+    for name, iterations in itertools.product(args.configs, args.iterations):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = {
+                **os.environ,
+                **CONFIGS[name],
+                "DB_NAME": os.path.join(tmp_dir, "bench.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--run",
+                 "--iterations", str(iterations),
+                 "--concurrency", str(args.concurrency),
+                 "--seconds", str(args.seconds)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            report[f"{name}/{iterations}"] = json.loads(
+                output.strip().splitlines()[-1]
+            )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Пропускная способность чтений лент на фоне записей через post_create.
+
+Запуск из корня репозитория:
+
+    python benchmarks/db_concurrency.py --readers 8 --writers 2 --seconds 10
+
+Сравнивает конфигурации базы: baseline — стандартный бэкенд SQLite без
+постоянных соединений, tuned — core.db.backends.sqlite3 с пулом, WAL,
+busy timeout и CONN_MAX_AGE. Каждая конфигурация запускается в отдельном
+процессе на своей временной базе, запросы идут через WSGI-приложение
+проекта. Результат печатается в JSON.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from wsgi_client import call, session_cookie, setup_django
+
+CONFIGS = {
+    "baseline": {
+        "DB_ENGINE": "django.db.backends.sqlite3",
+        "DB_CONN_MAX_AGE": "0",
+    },
+    "tuned": {
+        "DB_ENGINE": "sqlite3",
+        "DB_CONN_MAX_AGE": "60",
+    },
+}
+
+
+def seed(users, posts_per_user):
+    from posts.models import Post, User
+
+    cookies = []
+    for i in range(users):
+        user = User.objects.create_user(username=f"bench{i}")
+        for j in range(posts_per_user):
+            Post.objects.create(text=f"Пост {j}", author=user)
+        cookies.append(session_cookie(user))
+    return cookies
+
+
+def worker(app, deadline, stats, action):
+    ok = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            status = action(app)
+        except Exception:
+            status = 500
+        if status < 400:
+            ok += 1
+        else:
+            errors += 1
+    with stats["lock"]:
+        stats["ok"] += ok
+        stats["errors"] += errors
+
+
+def run(args):
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Меряем базу, а не кэш лент.
+    settings.FEED_CACHE_TIMEOUT = 0
+    call_command("migrate", verbosity=0)
+    cookies = seed(args.readers + args.writers, 20)
+
+    from django.db import connections
+    from posts.models import Post
+    from yatube.wsgi import application
+
+    posts_before = Post.objects.count()
+    connections.close_all()
+    reads = {"ok": 0, "errors": 0, "lock": threading.Lock()}
+    writes = {"ok": 0, "errors": 0, "lock": threading.Lock()}
+    deadline = time.monotonic() + args.seconds
+    threads = []
+    for i in range(args.readers):
+        cookie = cookies[i]
+        threads.append(threading.Thread(
+            target=worker,
+            args=(application, deadline, reads,
+                  lambda app, c=cookie: call(app, "GET", "/", c)),
+        ))
+    for i in range(args.writers):
+        cookie = cookies[args.readers + i]
+        data = {"text": "Новый пост"}
+        threads.append(threading.Thread(
+            target=worker,
+            args=(application, deadline, writes,
+                  lambda app, c=cookie: call(app, "POST", "/create/", c,
+                                             data)),
+        ))
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    result = {}
+    for name, stats in (("reads", reads), ("writes", writes)):
+        result[name] = {
+            "ok": stats["ok"],
+            "errors": stats["errors"],
+            "per_sec": round(stats["ok"] / elapsed, 1),
+        }
+    result["writes"]["created"] = Post.objects.count() - posts_before
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--configs", nargs="+", choices=CONFIGS, default=list(CONFIGS)
+    )
+    parser.add_argument("--run", choices=CONFIGS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args)
+        return
+    report = {}
+    for name in args.configs:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = {
+                **os.environ,
+                **CONFIGS[name],
+                "DB_NAME": os.path.join(tmp_dir, "bench.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", name,
+                 "--readers", str(args.readers),
+                 "--writers", str(args.writers),
+                 "--seconds", str(args.seconds)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            report[name] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Нагрузочный тест всех маршрутов Yatube на базах разного размера.
+
+Запуск из корня репозитория:
+
+    python benchmarks/load_test.py --sizes 10000 100000 --concurrency 8 \
+        --requests 200 --save benchmarks/baseline.json
+    python benchmarks/load_test.py --sizes 10000 \
+        --baseline benchmarks/baseline.json
+
+Каждый размер базы (число постов) прогоняется в отдельном процессе.
+База наполняется mixer и Faker один раз и переиспользуется из --data-dir,
+ведь 1M постов сеются минутами. Запросы идут через WSGI-приложение
+проекта из нескольких потоков; маршрут из URLconf, которого нет в
+routes(), останавливает прогон. Для каждого маршрута считаются p50, p95,
+p99, пропускная способность, ошибки и среднее число SQL-запросов
+(по метрикам core.metrics). Отчёт печатается в JSON. С --baseline
+p95 и число запросов сравниваются с сохранённым отчётом; регрессии
+больше --threshold печатаются в stderr, а код выхода становится 1.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from wsgi_client import ROOT, call, session_cookie, setup_django
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+USERS_PER_POSTS = 100
+GROUPS_PER_POSTS = 1000
+TEXT_POOL = 5000
+SEED_BATCH = 5000
+# Не нагружаются: админка и login/logout из django.contrib.auth.urls,
+# чьи пути перекрыты одноимёнными маршрутами users.urls.
+SKIPPED_NAMESPACES = {"admin"}
+SKIPPED_ROUTES = {"login", "logout"}
+
+
+def seed(size):
+    """Дополняет базу до size постов, возвращает число добавленных."""
+    from django.core.management import call_command
+    from faker import Faker
+    from mixer.backend.django import Mixer
+    from posts import feed_cache
+    from posts.models import Group, Post, User, keep_dates
+
+    existing = Post.objects.count()
+    if existing >= size:
+        return 0
+    fake = Faker("ru_RU")
+    fake.seed_instance(size)
+    mixer = Mixer(commit=False, locale="ru_RU")
+    offset = User.objects.count()
+    users = max(size // USERS_PER_POSTS, 1) - offset
+    if users > 0:
+        User.objects.bulk_create(mixer.cycle(users).blend(
+            User, username=mixer.sequence(lambda n: f"user{offset + n}")
+        ))
+    offset = Group.objects.count()
+    groups = max(size // GROUPS_PER_POSTS, 1) - offset
+    if groups > 0:
+        Group.objects.bulk_create(mixer.cycle(groups).blend(
+            Group, slug=mixer.sequence(lambda n: f"group-{offset + n}")
+        ))
+    author_ids = list(User.objects.values_list("id", flat=True))
+    group_ids = list(Group.objects.values_list("id", flat=True)) + [None]
+    # Faker медленный: тексты генерируются заранее и повторяются.
+    texts = [fake.text(max_nb_chars=400) for _ in range(TEXT_POOL)]
+    dates = fake.date_time_between
+    with keep_dates():
+        for start in range(existing, size, SEED_BATCH):
+            batch = []
+            for _ in range(min(SEED_BATCH, size - start)):
+                pub_date = dates("-3y", tzinfo=fake.pytimezone())
+                batch.append(Post(
+                    text=random.choice(texts),
+                    author_id=random.choice(author_ids),
+                    group_id=random.choice(group_ids),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                ))
+            Post.objects.bulk_create(batch)
+    # bulk_create обходит сигналы: счётчики, индекс, свёртки профилей и
+    # ленты подписок пересчитываем сами.
+    call_command("recount_posts", verbosity=0)
+    call_command("rebuild_search_index", verbosity=0)
+    call_command("rebuild_rollups", verbosity=0)
+    call_command("rebuild_timelines", verbosity=0)
+    feed_cache.invalidate_all()
+    return size - existing
+
+
+def url_names(patterns=None, namespace=""):
+    """Имена всех маршрутов URLconf, кроме SKIPPED_NAMESPACES."""
+    from django.urls import URLResolver, get_resolver
+
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    names = set()
+    for pattern in patterns:
+        if not isinstance(pattern, URLResolver):
+            if pattern.name:
+                names.add(namespace + pattern.name)
+        elif pattern.namespace not in SKIPPED_NAMESPACES:
+            prefix = f"{pattern.namespace}:" if pattern.namespace else ""
+            names |= url_names(pattern.url_patterns, namespace + prefix)
+    return names
+
+
+def routes(cookie, staff_cookie):
+    """Маршруты: имя, метод, путь, query string, cookie, данные формы и
+    имя маршрута в URLconf.
+
+    Маршрут URLconf без записи здесь — ошибка: новый view не должен
+    выпадать из нагрузочного теста незамеченным.
+    """
+    from django.contrib.auth.tokens import default_token_generator
+    from django.urls import reverse
+    from django.utils.encoding import force_bytes
+    from django.utils.http import urlsafe_base64_encode
+    from posts.models import Group, Post, User
+    from posts.paginators import FORWARD, encode_cursor
+
+    post = Post.objects.order_by("-pub_date", "-id").first()
+    deep = Post.objects.order_by("-pub_date", "-id")[
+        Post.objects.count() // 2
+    ]
+    group = Group.objects.order_by("-post_count").first()
+    author = User.objects.get(pk=post.author_id)
+    other = User.objects.exclude(pk=author.pk).order_by("id").first()
+    word = post.text.split()[0]
+    uid = urlsafe_base64_encode(force_bytes(author.pk))
+    token = default_token_generator.make_token(author)
+
+    def route(name, url_name, kwargs=None, query=None, cookie="",
+              method="GET", data=None):
+        path = reverse(url_name, kwargs=kwargs)
+        return (name, method, path, query or {}, cookie, data, url_name)
+
+    table = [
+        route("index", "posts:index"),
+        route("index_deep", "posts:index", query={
+            "cursor": encode_cursor(FORWARD, (deep.pub_date, deep.id))
+        }),
+        route("group_index", "posts:group_index"),
+        route("group_list", "posts:group_list", {"slug": group.slug}),
+        route("profile", "posts:profile", {"username": author.username}),
+        route("post_detail", "posts:post_detail", {"post_id": post.pk}),
+        route("post_search", "posts:post_search", query={"q": word}),
+        route("post_create", "posts:post_create", cookie=cookie),
+        route("post_edit", "posts:post_edit", {"post_id": post.pk},
+              cookie=cookie),
+        route("follow_index", "posts:follow_index", cookie=cookie),
+        # Повторная подписка ничего не меняет, поэтому после первого
+        # запроса меряется путь до редиректа.
+        route("profile_follow", "posts:profile_follow",
+              {"username": other.username}, cookie=cookie, method="POST",
+              data={}),
+        route("profile_unfollow", "posts:profile_unfollow",
+              {"username": other.username}, cookie=cookie, method="POST",
+              data={}),
+        route("group_follow", "posts:group_follow", {"slug": group.slug},
+              cookie=cookie, method="POST", data={}),
+        route("group_unfollow", "posts:group_unfollow",
+              {"slug": group.slug}, cookie=cookie, method="POST", data={}),
+        route("api_post_list", "api:post_list"),
+        route("api_post_export", "api:post_export",
+              query={"author": author.username}),
+        route("api_post_detail", "api:post_detail", {"post_id": post.pk}),
+        route("api_group_list", "api:group_list"),
+        route("api_group_detail", "api:group_detail", {"slug": group.slug}),
+        route("api_profile", "api:profile", {"username": author.username}),
+        route("about_author", "about:author"),
+        route("about_tech", "about:tech"),
+        route("login", "users:login"),
+        # Выход с общей сессией разлогинил бы остальные маршруты.
+        route("logout", "users:logout"),
+        route("signup", "users:signup"),
+        route("password_reset_form", "users:password_reset_form"),
+        route("password_change", "password_change", cookie=cookie),
+        route("password_change_done", "password_change_done",
+              cookie=cookie),
+        route("password_reset", "password_reset"),
+        route("password_reset_done", "password_reset_done"),
+        route("password_reset_confirm", "password_reset_confirm",
+              {"uidb64": uid, "token": token}),
+        route("password_reset_complete", "password_reset_complete"),
+        route("metrics", "metrics", cookie=staff_cookie),
+    ]
+    missing = url_names() - SKIPPED_ROUTES - {entry[-1] for entry in table}
+    if missing:
+        raise RuntimeError(
+            f"Маршруты без нагрузки: {', '.join(sorted(missing))}"
+        )
+    return table
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = max(round(percent / 100 * len(values)) - 1, 0)
+    return values[index]
+
+
+def hammer(app, method, path, query, cookie, data, requests, concurrency):
+    """Отправляет requests запросов из concurrency потоков."""
+    counter = itertools.count()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        while next(counter) < requests:
+            started = time.perf_counter()
+            try:
+                status = call(app, method, path, cookie, data, query)
+            except Exception:
+                status = 500
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status >= 400:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors), time.perf_counter() - started
+
+
+def run(args):
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+    from posts.models import Post, User
+    from yatube.wsgi import application
+
+    from core.metrics import registry
+
+    if args.no_cache:
+        settings.FEED_CACHE_TIMEOUT = 0
+    call_command("migrate", verbosity=0)
+    started = time.perf_counter()
+    seeded = seed(args.run)
+    seed_seconds = time.perf_counter() - started
+    post = Post.objects.order_by("-pub_date", "-id").first()
+    cookie = session_cookie(post.author)
+    staff, _ = User.objects.get_or_create(
+        username="bench-staff", defaults={"is_staff": True}
+    )
+    staff_cookie = session_cookie(staff)
+    connections.close_all()
+    report = {
+        "posts": Post.objects.count(),
+        "seeded": seeded,
+        "seed_seconds": round(seed_seconds, 1),
+        "routes": {},
+    }
+    for entry in routes(cookie, staff_cookie):
+        name, method, path, query, route_cookie, data, url_name = entry
+        # Прогрев: первый запрос заполняет кэши и пул соединений.
+        call(application, method, path, route_cookie, data, query)
+        registry.clear()
+        latencies, errors, elapsed = hammer(
+            application, method, path, query, route_cookie, data,
+            args.requests, args.concurrency,
+        )
+        queries = registry.get("yatube_db_queries", url_name)
+        report["routes"][name] = {
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "rps": round(len(latencies) / elapsed, 1),
+            "errors": errors,
+            "queries": (
+                round(queries.sum / queries.count, 2) if queries else 0
+            ),
+        }
+    print(json.dumps(report))
+
+
+def compare(report, baseline, threshold):
+    """Список регрессий p95 и числа запросов относительно baseline."""
+    regressions = []
+    for size, result in report.items():
+        for name, stats in result["routes"].items():
+            base = baseline.get(size, {}).get("routes", {}).get(name)
+            if base is None:
+                continue
+            for metric in ("p95_ms", "queries"):
+                before, after = base[metric], stats[metric]
+                if after > before * (1 + threshold):
+                    regressions.append(
+                        f"{size} {name} {metric}: {before} -> {after}"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=DEFAULT_SIZES
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="запросов на маршрут"
+    )
+    parser.add_argument(
+        "--data-dir", default=os.path.join(ROOT, "benchmarks", "data"),
+        help="где хранить наполненные базы между запусками",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="отключить кэш лент"
+    )
+    parser.add_argument("--save", help="сохранить отчёт как baseline")
+    parser.add_argument("--baseline", help="сравнить с сохранённым отчётом")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args)
+        return
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {}
+    for size in args.sizes:
+        env = {
+            **os.environ,
+            "DB_NAME": os.path.join(args.data_dir, f"posts-{size}.sqlite3"),
+        }
+        command = [
+            sys.executable, __file__, "--run", str(size),
+            "--concurrency", str(args.concurrency),
+            "--requests", str(args.requests),
+        ]
+        if args.no_cache:
+            command.append("--no-cache")
+        output = subprocess.run(
+            command, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        report[str(size)] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"Регрессия: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
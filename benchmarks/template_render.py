@@ -0,0 +1,112 @@
+"""Время рендеринга шаблонов по страницам с кэшем шаблонов и без него.
+
+Запуск из корня репозитория:
+
+    python benchmarks/template_render.py --requests 200
+
+baseline разбирает шаблоны с диска на каждый запрос и рендерит шапку и
+подвал заново; cached включает cached loader с прогревом в wsgi.py и кэш
+фрагментов. Кэш лент отключён в обоих случаях, чтобы мерить шаблоны, а
+не готовый HTML. Время берётся из метрики
+yatube_template_render_seconds, результат печатается в JSON.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from wsgi_client import call, session_cookie, setup_django
+
+CONFIGS = {
+    "baseline": {"TEMPLATE_CACHE": "0"},
+    "cached": {"TEMPLATE_CACHE": "1"},
+}
+
+
+def pages(cookie):
+    from django.urls import reverse
+    from posts.models import Group, Post
+
+    post = Post.objects.first()
+    group = Group.objects.first()
+    return [
+        ("posts:index", reverse("posts:index"), ""),
+        ("posts:group_list",
+         reverse("posts:group_list", kwargs={"slug": group.slug}), ""),
+        ("posts:profile",
+         reverse("posts:profile", kwargs={"username": post.author}), ""),
+        ("posts:post_detail",
+         reverse("posts:post_detail", kwargs={"post_id": post.pk}), ""),
+        ("posts:post_create", reverse("posts:post_create"), cookie),
+        ("about:author", reverse("about:author"), ""),
+        ("users:login", reverse("users:login"), ""),
+    ]
+
+
+def run(args):
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.FEED_CACHE_TIMEOUT = 0
+    if args.run == "baseline":
+        settings.FRAGMENT_CACHE_TIMEOUT = 0
+    call_command("migrate", verbosity=0)
+
+    from posts.models import Group, Post, User
+
+    user = User.objects.create_user(username="bench")
+    group = Group.objects.create(title="Группа", slug="bench")
+    for i in range(20):
+        Post.objects.create(text=f"Пост {i}", author=user, group=group)
+    cookie = session_cookie(user)
+
+    from core.metrics import registry
+    from yatube.wsgi import application
+
+    result = {}
+    for view_name, path, page_cookie in pages(cookie):
+        registry.clear()
+        for _ in range(args.requests):
+            call(application, "GET", path, page_cookie)
+        render = registry.get("yatube_template_render_seconds", view_name)
+        total = registry.get("yatube_request_duration_seconds", view_name)
+        result[view_name] = {
+            "render_ms": round(render.sum / render.count * 1000, 3),
+            "request_ms": round(total.sum / total.count * 1000, 3),
+        }
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--configs", nargs="+", choices=CONFIGS, default=list(CONFIGS)
+    )
+    parser.add_argument("--run", choices=CONFIGS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args)
+        return
+    report = {}
+    for name in args.configs:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = {
+                **os.environ,
+                **CONFIGS[name],
+                "DB_NAME": os.path.join(tmp_dir, "bench.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", name,
+                 "--requests", str(args.requests)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            report[name] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
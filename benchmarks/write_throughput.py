@@ -0,0 +1,173 @@
+"""Устойчивая пропускная способность создания постов.
+
+Запуск из корня репозитория:
+
+    python benchmarks/write_throughput.py --writers 8 --seconds 10
+
+Сравнивает приём постов через post_create: sync — каждый запрос сам
+записывает пост со счётчиками, поиском и лентами подписок, write_behind —
+запрос кладёт пост в очередь, а один поток-писатель переносит очередь в
+Post пачками (posts.submissions.drain). Ограничение частоты отключено.
+Каждая конфигурация запускается в отдельном процессе на своей временной
+базе SQLite. Считаются принятые запросы, их задержка и посты, реально
+записанные в Post к моменту, когда писатель разобрал очередь.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from wsgi_client import call, session_cookie, setup_django
+
+CONFIGS = {
+    "sync": {"POST_WRITE_BEHIND": "0"},
+    "write_behind": {"POST_WRITE_BEHIND": "1"},
+}
+
+
+def seed(users, followers):
+    """Авторы и подписчики, чтобы запись поста раздавала его по лентам."""
+    from posts.models import Follow, User
+
+    authors = [
+        User.objects.create_user(username=f"author{i}") for i in range(users)
+    ]
+    User.objects.bulk_create(
+        User(username=f"reader{i}") for i in range(followers)
+    )
+    readers = User.objects.filter(username__startswith="reader")
+    for author in authors:
+        for reader in readers:
+            Follow.objects.create(user=reader, author=author)
+    return [session_cookie(author) for author in authors]
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def writer(app, name, cookie, deadline, stats):
+    latencies, errors, i = [], 0, 0
+    while time.monotonic() < deadline:
+        i += 1
+        data = {"text": f"Пост {i}", "idempotency_key": f"{name}-{i}"}
+        started = time.monotonic()
+        try:
+            status = call(app, "POST", "/create/", cookie, data)
+        except Exception:
+            status = 500
+        if status < 400:
+            latencies.append(time.monotonic() - started)
+        else:
+            errors += 1
+    with stats["lock"]:
+        stats["latencies"] += latencies
+        stats["errors"] += errors
+
+
+def drainer(stop):
+    from django.db import connection
+    from posts import submissions
+
+    while True:
+        if not submissions.drain() and stop.is_set():
+            break
+        time.sleep(0.05)
+    connection.close()
+
+
+def run(args):
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.POST_RATE_LIMIT = 0
+    call_command("migrate", verbosity=0)
+    cookies = seed(args.writers, args.followers)
+
+    from django.db import connections
+    from posts.models import Post
+    from yatube.wsgi import application
+
+    connections.close_all()
+    stats = {"latencies": [], "errors": 0, "lock": threading.Lock()}
+    stop = threading.Event()
+    drain_thread = threading.Thread(target=drainer, args=(stop,))
+    if settings.POST_WRITE_BEHIND:
+        drain_thread.start()
+    deadline = time.monotonic() + args.seconds
+    threads = [
+        threading.Thread(
+            target=writer, args=(application, i, cookie, deadline, stats)
+        )
+        for i, cookie in enumerate(cookies)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    accepted_in = time.monotonic() - started
+    stop.set()
+    if settings.POST_WRITE_BEHIND:
+        drain_thread.join()
+    written_in = time.monotonic() - started
+    latencies = stats["latencies"]
+    written = Post.objects.count()
+    print(json.dumps({
+        "accepted": len(latencies),
+        "errors": stats["errors"],
+        "accepted_per_sec": round(len(latencies) / accepted_in, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "written": written,
+        "written_per_sec": round(written / written_in, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument(
+        "--followers",
+        type=int,
+        default=50,
+        help="Подписчиков у каждого автора",
+    )
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--configs", nargs="+", choices=CONFIGS, default=list(CONFIGS)
+    )
+    parser.add_argument("--run", choices=CONFIGS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args)
+        return
+    report = {}
+    for name in args.configs:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = {
+                **os.environ,
+                **CONFIGS[name],
+                "DB_NAME": os.path.join(tmp_dir, "bench.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", name,
+                 "--writers", str(args.writers),
+                 "--followers", str(args.followers),
+                 "--seconds", str(args.seconds)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            report[name] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Общие помощники бенчмарков: запросы прямо в WSGI-приложение Yatube.
+
+В отличие от django.test.Client запрос проходит весь путь настоящего
+сервера, включая request_started/request_finished и закрытие соединений.
+"""
+import io
+import os
+import sys
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, "yatube")
+# Любая строка из 64 символов годится и как cookie, и как токен формы.
+CSRF_TOKEN = "b" * 64
+
+
+def setup_django():
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+    import django
+
+    django.setup()
+
+
+def call(app, method, path, cookie="", data=None, query=None):
+    """Выполняет запрос и возвращает HTTP-статус."""
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update(
+        REQUEST_METHOD=method,
+        PATH_INFO=path,
+        QUERY_STRING=urlencode(query or {}),
+        HTTP_COOKIE=cookie,
+    )
+    if data is not None:
+        data = {"csrfmiddlewaretoken": CSRF_TOKEN, **data}
+        body = urlencode(data).encode()
+        environ.update(
+            CONTENT_TYPE="application/x-www-form-urlencoded",
+            CONTENT_LENGTH=str(len(body)),
+        )
+        environ["wsgi.input"] = io.BytesIO(body)
+    status = []
+
+    def start_response(value, headers, exc_info=None):
+        status.append(value)
+
+    result = app(environ, start_response)
+    try:
+        b"".join(result)
+    finally:
+        # close() шлёт request_finished, а с ним закрытие соединений.
+        result.close()
+    return int(status[0].split()[0])
+
+
+def session_cookie(user):
+    """Cookie авторизованной сессии пользователя вместе с CSRF-токеном."""
+    from importlib import import_module
+
+    from django.conf import settings
+    from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                     SESSION_KEY)
+
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f"sessionid={session.session_key}; csrftoken={CSRF_TOKEN}"
@@ -1,5 +1,11 @@
 import datetime
 
+from django.conf import settings
+
 
 def сurrent_date(request):
     return {"year": datetime.date.today().year}
+
+
+def fragment_cache(request):
+    return {"fragment_cache_timeout": settings.FRAGMENT_CACHE_TIMEOUT}
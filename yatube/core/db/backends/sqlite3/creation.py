@@ -0,0 +1,119 @@
+"""Тестовые базы SQLite из заранее смигрированного шаблона.
+
+Миграции применяются один раз, после чего база сохраняется в файл в
+TEST_DB_TEMPLATE_DIR. Имя файла зависит от содержимого миграций всех
+приложений, поэтому новая миграция просто даёт новый шаблон. Следующие
+прогоны manage.py test и pytest копируют шаблон в тестовую базу
+(файловую или в памяти) через backup API SQLite, и migrate уже ничего
+не применяет. Клоны для параллельных процессов делаются как обычно:
+форком для базы в памяти, копией файла для файловой.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+from importlib import import_module
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db.backends.sqlite3 import creation
+from django.db.migrations.loader import MigrationLoader
+
+
+def migrations_digest():
+    """Хэш версии Django и файлов миграций всех приложений."""
+    digest = hashlib.sha1(django.get_version().encode())
+    for app_config in sorted(apps.get_app_configs(), key=lambda a: a.label):
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        try:
+            module = import_module(module_name)
+        except ImportError:
+            continue
+        path = os.path.dirname(getattr(module, "__file__", None) or "")
+        if not path:
+            continue
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".py"):
+                continue
+            digest.update(f"{app_config.label}/{name}".encode())
+            with open(os.path.join(path, name), "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def _backup(source, target):
+    target_connection = sqlite3.connect(target, uri=True)
+    source_connection = sqlite3.connect(source, uri=True)
+    try:
+        source_connection.backup(target_connection)
+    finally:
+        source_connection.close()
+    return target_connection
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    template = None
+    from_template = False
+    # Держит открытой базу в памяти между копированием шаблона и первым
+    # подключением Django: иначе SQLite её сразу удалит.
+    _keeper = None
+
+    def template_path(self):
+        directory = getattr(settings, "TEST_DB_TEMPLATE_DIR", "")
+        if not directory:
+            return None
+        return os.path.join(
+            directory, f"{self.connection.alias}-{migrations_digest()}.sqlite3"
+        )
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        name = super()._create_test_db(verbosity, autoclobber, keepdb)
+        self.template = None if keepdb else self.template_path()
+        self.from_template = bool(
+            self.template and os.path.exists(self.template)
+        )
+        if self.from_template:
+            if verbosity >= 1:
+                self.log(f"Copying test database from {self.template}...")
+            self._keeper = _backup(self.template, name)
+            if not self.is_in_memory_db(name):
+                self._keeper.close()
+                self._keeper = None
+        return name
+
+    def create_test_db(self, verbosity=1, autoclobber=False, serialize=True,
+                       keepdb=False):
+        name = super().create_test_db(
+            verbosity, autoclobber, serialize, keepdb
+        )
+        if self.template and not self.from_template:
+            self.save_template(verbosity)
+        return name
+
+    def save_template(self, verbosity=1):
+        directory = os.path.dirname(self.template)
+        os.makedirs(directory, exist_ok=True)
+        self.connection.ensure_connection()
+        fd, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        target = sqlite3.connect(path)
+        try:
+            self.connection.connection.backup(target)
+        finally:
+            target.close()
+        # Параллельный прогон мог записать тот же шаблон: replace атомарен.
+        os.replace(path, self.template)
+        prefix = f"{self.connection.alias}-"
+        for name in os.listdir(directory):
+            stale = os.path.join(directory, name)
+            if name.startswith(prefix) and stale != self.template:
+                os.remove(stale)
+        if verbosity >= 1:
+            self.log(f"Saved test database template {self.template}")
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        if self._keeper is not None:
+            self._keeper.close()
+            self._keeper = None
+        super()._destroy_test_db(test_database_name, verbosity)
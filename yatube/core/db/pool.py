@@ -0,0 +1,99 @@
+import queue
+import threading
+
+
+class ConnectionPool:
+    """Пул простаивающих DB-API соединений одной базы.
+
+    Держит не больше max_size свободных соединений; лишние при возврате
+    закрываются. Соединения выдаются в порядке LIFO, чтобы чаще
+    использовались «тёплые».
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+
+    def acquire(self, factory):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return factory()
+
+    def release(self, connection):
+        try:
+            # Незавершённая транзакция не должна достаться следующему.
+            connection.rollback()
+        except Exception:
+            connection.close()
+            return
+        if self._idle.qsize() >= self.max_size:
+            connection.close()
+            return
+        self._idle.put(connection)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @property
+    def idle(self):
+        return self._idle.qsize()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, max_size):
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(max_size)
+        return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """Берёт соединения из пула и возвращает их туда вместо закрытия.
+
+    Размер пула задаётся ключом OPTIONS["pool_size"]; 0 отключает пул.
+    """
+
+    default_pool_size = 8
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool_size", None)
+        return params
+
+    @property
+    def pool(self):
+        size = self.settings_dict["OPTIONS"].get(
+            "pool_size", self.default_pool_size
+        )
+        if not size or not self.can_pool():
+            return None
+        return get_pool((self.alias, self.settings_dict["NAME"]), size)
+
+    def can_pool(self):
+        return True
+
+    def create_connection(self, conn_params):
+        """Открывает новое соединение в обход пула."""
+        return super().get_new_connection(conn_params)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return self.create_connection(conn_params)
+        return pool.acquire(lambda: self.create_connection(conn_params))
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
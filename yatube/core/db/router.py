@@ -0,0 +1,56 @@
+"""Чтение с реплик с гарантией read-your-writes.
+
+Middleware DatabaseRoutingMiddleware заводит на запрос RoutingState.
+Чтения GET и HEAD к view из DB_REPLICA_VIEWS уходят на реплику из
+DATABASE_REPLICAS, случайную, но одну на весь запрос, всё остальное —
+на default. Если за запрос что-то записано в базу, браузер получает
+cookie PIN_COOKIE и следующие DB_PRIMARY_PIN_SECONDS секунд читает
+только с default: редирект после создания поста покажет его, даже если
+реплика отстаёт.
+"""
+import contextvars
+
+PIN_COOKIE = "db_pin"
+
+
+class RoutingState:
+    """replica — алиас реплики, выбранной на весь запрос, или None."""
+
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+    @property
+    def use_replica(self):
+        return self.replica is not None
+
+
+current = contextvars.ContextVar("yatube_db_routing", default=None)
+
+
+def reading_replica():
+    """Читает ли текущий запрос с реплики, которая может отставать."""
+    state = current.get()
+    return state is not None and state.use_replica
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        if state is None or not state.use_replica:
+            return "default"
+        # Все чтения запроса идут в одну реплику: у разных реплик разное
+        # отставание, и пост, найденный в одной, мог не дойти до другой.
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты с них связываются свободно.
+        return True
@@ -0,0 +1,159 @@
+"""Адаптивные картинки на sorl-thumbnail.
+
+Для каждого пресета из THUMBNAIL_PRESETS миниатюры нарезаются в
+нескольких ширинах в исходном формате и в WebP. Нарезает их команда
+generate_thumbnails вне запроса; шаблонный тег {% picture %} только ищет
+готовые миниатюры в хранилище ключей sorl и собирает srcset, а пока
+их нет, отдаёт исходную картинку.
+"""
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import FileSystemStorage
+from django.templatetags.static import static
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+WEBP = "WEBP"
+EMPTY_VALUE = cached_db_kvstore.EMPTY_VALUE
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """cached_db с пакетным чтением для тега {% picture %}."""
+
+    def get_many(self, image_files):
+        """Записи для списка миниатюр: один get_many кэша и один запрос
+        к базе на промахи. Промахи кэшируются на THUMBNAIL_MISS_TIMEOUT
+        секунд: картинка без миниатюр не стоит запроса на каждый рендер,
+        а нарезанные другим процессом миниатюры появятся через таймаут."""
+        keys = [add_prefix(image_file.key) for image_file in image_files]
+        values = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            found = dict(
+                KVStoreModel.objects.filter(key__in=missing).values_list(
+                    "key", "value"
+                )
+            )
+            self.cache.set_many(found, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+            self.cache.set_many(
+                {key: EMPTY_VALUE for key in missing if key not in found},
+                settings.THUMBNAIL_MISS_TIMEOUT,
+            )
+            values.update(found)
+        return [
+            None if value == EMPTY_VALUE else deserialize_image_file(value)
+            for value in (values.get(key, EMPTY_VALUE) for key in keys)
+        ]
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    """Бэкенд sorl, который умеет искать миниатюру, не создавая её."""
+
+    def _thumbnail_file(self, source, geometry_string, options):
+        # Те же опции и имя файла, что и в get_thumbnail.
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        return ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage,
+        )
+
+    def find_thumbnail(self, file_, geometry_string, **options):
+        thumbnail = self._thumbnail_file(
+            ImageFile(file_), geometry_string, options
+        )
+        return default.kvstore.get(thumbnail)
+
+    def find_thumbnails(self, file_, requests):
+        """Готовые миниатюры для списка пар (геометрия, опции)."""
+        source = ImageFile(file_)
+        return default.kvstore.get_many([
+            self._thumbnail_file(source, geometry_string, dict(options))
+            for geometry_string, options in requests
+        ])
+
+
+def static_image(name):
+    """Картинка из статики как источник для sorl."""
+    path = finders.find(name)
+    if path is None:
+        return None
+    location = path[: -len(name)].rstrip(os.sep)
+    return ImageFile(name, FileSystemStorage(location=location))
+
+
+def _source(image):
+    if isinstance(image, str):
+        return static_image(image)
+    return image or None
+
+
+def _options(fmt):
+    options = {"upscale": False}
+    if fmt is not None:
+        options["format"] = fmt
+    return options
+
+
+def generate(image, preset):
+    """Нарезает все миниатюры пресета, возвращает их число."""
+    source = _source(image)
+    if source is None:
+        return 0
+    created = 0
+    for width in settings.THUMBNAIL_PRESETS[preset]["widths"]:
+        for fmt in (None, WEBP):
+            if default.backend.find_thumbnail(
+                source, str(width), **_options(fmt)
+            ):
+                continue
+            default.backend.get_thumbnail(source, str(width), **_options(fmt))
+            created += 1
+    return created
+
+
+def _srcset(thumbnails):
+    candidates = {}
+    for thumbnail in thumbnails:
+        if thumbnail:
+            # Без увеличения миниатюра бывает уже запрошенной ширины.
+            candidates.setdefault(thumbnail.width, thumbnail.url)
+    return ", ".join(
+        f"{url} {width}w" for width, url in sorted(candidates.items())
+    )
+
+
+def picture(image, preset):
+    """src, srcset исходного формата и WebP и sizes для тега <picture>."""
+    spec = settings.THUMBNAIL_PRESETS[preset]
+    if isinstance(image, str):
+        src = static(image)
+    else:
+        src = image.url
+    source = _source(image)
+    if source is None:
+        return {"src": src, "srcset": "", "webp": "", "sizes": ""}
+    widths = spec["widths"]
+    thumbnails = default.backend.find_thumbnails(
+        source,
+        [
+            (str(width), _options(fmt))
+            for fmt in (None, WEBP)
+            for width in widths
+        ],
+    )
+    return {
+        "src": src,
+        "srcset": _srcset(thumbnails[: len(widths)]),
+        "webp": _srcset(thumbnails[len(widths):]),
+        "sizes": spec["sizes"],
+    }
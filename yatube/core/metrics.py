@@ -0,0 +1,116 @@
+"""Метрики производительности запросов в памяти процесса.
+
+Гистограммы копятся по имени view и отдаются на /metrics в текстовом
+формате Prometheus. Каждый процесс считает только свои запросы.
+"""
+import bisect
+import contextvars
+import threading
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    "yatube_request_duration_seconds": (
+        "Полное время обработки запроса", DURATION_BUCKETS
+    ),
+    "yatube_db_duration_seconds": (
+        "Время выполнения SQL-запросов за запрос", DURATION_BUCKETS
+    ),
+    "yatube_db_queries": ("Число SQL-запросов за запрос", QUERY_BUCKETS),
+    "yatube_template_render_seconds": (
+        "Время рендеринга шаблонов за запрос", DURATION_BUCKETS
+    ),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, view, values):
+        with self._lock:
+            for name, value in values.items():
+                key = (name, view)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(
+                        METRICS[name][1]
+                    )
+                histogram.observe(value)
+
+    def get(self, name, view):
+        return self._histograms.get((name, view))
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for name, (help_text, _) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                views = sorted(
+                    view for metric, view in self._histograms
+                    if metric == name
+                )
+                for view in views:
+                    histogram = self._histograms[(name, view)]
+                    label = _escape(view)
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{view="{label}",le="{bound}"}} '
+                            f"{total}"
+                        )
+                    lines.append(
+                        f'{name}_sum{{view="{label}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{name}_count{{view="{label}"}} {histogram.count}'
+                    )
+            return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+registry = Registry()
+
+
+class RequestStats:
+    __slots__ = ("db_time", "queries", "template_time")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+
+
+current = contextvars.ContextVar("yatube_request_stats", default=None)
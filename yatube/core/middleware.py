@@ -0,0 +1,88 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .db import router
+from .metrics import RequestStats, current, registry
+
+
+def _timed_execute(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = current.get()
+        if stats is not None:
+            stats.db_time += time.perf_counter() - started
+            stats.queries += 1
+
+
+class MetricsMiddleware:
+    """Замеряет время запроса, время и число SQL-запросов и время
+    рендеринга шаблонов и копит их по имени view (posts:index, ...)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(_timed_execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        registry.observe(view, {
+            "yatube_request_duration_seconds": (
+                time.perf_counter() - started
+            ),
+            "yatube_db_duration_seconds": stats.db_time,
+            "yatube_db_queries": stats.queries,
+            "yatube_template_render_seconds": stats.template_time,
+        })
+        return response
+
+
+class DatabaseRoutingMiddleware:
+    """Направляет чтения view из DB_REPLICA_VIEWS на реплики и закрепляет
+    браузер за default после записи, см. core.db.router."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = router.RoutingState()
+        token = router.current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            router.current.reset(token)
+        if state.wrote:
+            response.set_cookie(
+                router.PIN_COOKIE,
+                "1",
+                max_age=settings.DB_PRIMARY_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = router.current.get()
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in ("GET", "HEAD")
+            and router.PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name in settings.DB_REPLICA_VIEWS
+        ):
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+def query_budget(limit):
+    """Объявляет, сколько SQL-запросов может стоить страница view.
+
+    Бюджет включает запросы сессии и пользователя, которые делает
+    middleware, то есть считается на весь запрос целиком.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета запросов для TestCase."""
+
+    def clear_caches(self):
+        """Холодный старт: пустые кэши фрагментов, миниатюр и прочие."""
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def assertWithinQueryBudget(self, url, client=None, data=None,
+                                cold=True):
+        """Страница укладывается в бюджет своего view. С cold=True она
+        запрашивается дважды: с пустыми кэшами и с прогретыми."""
+        client = client or self.client
+        view = resolve(url).func
+        limit = getattr(view, "query_budget", None)
+        self.assertIsNotNone(
+            limit, f"У view для {url} не объявлен бюджет запросов"
+        )
+        if cold:
+            self.clear_caches()
+            self._assert_queries(url, client, data, limit, "холодный кэш")
+        return self._assert_queries(url, client, data, limit, "тёплый кэш")
+
+    def _assert_queries(self, url, client, data, limit, label):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, data)
+        executed = len(ctx.captured_queries)
+        self.assertLessEqual(
+            executed,
+            limit,
+            f"{url} ({label}): {executed} запросов при бюджете {limit}:\n"
+            + "\n".join(query["sql"] for query in ctx.captured_queries),
+        )
+        return response
@@ -0,0 +1,116 @@
+"""WSGI-слой, отдающий собранную статику мимо Django.
+
+Файлы из STATIC_ROOT индексируются при старте, поэтому запрос к статике
+не доходит до middleware и URLconf. Имена с хэшем из манифеста
+отдаются с Cache-Control immutable на год, остальные — с короткой
+ревалидацией. Если клиент принимает br или gzip и collectstatic
+положил рядом сжатую копию, отдаётся она.
+"""
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=60"
+# Порядок предпочтения сжатых вариантов.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or "application/octet-stream"
+        )
+        self.cache_control = IMMUTABLE if immutable else REVALIDATE
+        self.variants = {None: self._variant(path)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants[encoding] = self._variant(path + suffix)
+
+    @staticmethod
+    def _variant(path):
+        stat = os.stat(path)
+        return {
+            "path": path,
+            "size": stat.st_size,
+            "etag": f'"{int(stat.st_mtime):x}-{stat.st_size:x}"',
+            "last_modified": formatdate(stat.st_mtime, usegmt=True),
+        }
+
+    def choose(self, accept_encoding):
+        accepted = set()
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0"):
+                accepted.add(name.strip())
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+class StaticFilesApp:
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = self._scan()
+
+    def _hashed_names(self):
+        manifest = os.path.join(self.root, "staticfiles.json")
+        if not os.path.exists(manifest):
+            return set()
+        with open(manifest, encoding="utf-8") as file:
+            return set(json.load(file).get("paths", {}).values())
+
+    def _scan(self):
+        hashed = self._hashed_names()
+        files = {}
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(root, name)
+                base, suffix = os.path.splitext(path)
+                if suffix in (".gz", ".br") and os.path.exists(base):
+                    continue
+                url = os.path.relpath(path, self.root).replace(os.sep, "/")
+                files[self.prefix + url] = StaticFile(path, url in hashed)
+        return files
+
+    def __call__(self, environ, start_response):
+        static = self.files.get(environ.get("PATH_INFO", ""))
+        if static is None:
+            return self.application(environ, start_response)
+        method = environ["REQUEST_METHOD"]
+        if method not in ("GET", "HEAD"):
+            start_response(
+                "405 Method Not Allowed", [("Allow", "GET, HEAD")]
+            )
+            return [b""]
+        encoding, variant = static.choose(
+            environ.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        headers = [
+            ("Cache-Control", static.cache_control),
+            ("ETag", variant["etag"]),
+            ("Last-Modified", variant["last_modified"]),
+            ("Vary", "Accept-Encoding"),
+        ]
+        if environ.get("HTTP_IF_NONE_MATCH") == variant["etag"]:
+            start_response("304 Not Modified", headers)
+            return [b""]
+        headers += [
+            ("Content-Type", static.content_type),
+            ("Content-Length", str(variant["size"])),
+        ]
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+        start_response("200 OK", headers)
+        if method == "HEAD":
+            return [b""]
+        file_wrapper = environ.get("wsgi.file_wrapper", FileWrapper)
+        return file_wrapper(open(variant["path"], "rb"), CHUNK_SIZE)
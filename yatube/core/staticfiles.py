@@ -0,0 +1,196 @@
+"""Сборка статики для продакшена.
+
+CompressedManifestStaticFilesStorage при collectstatic:
+
+* вырезает из CSS, перечисленных в STATIC_PURGE_CSS, правила с классами,
+  которые не встречаются в шаблонах (purge_css);
+* добавляет к именам хэш содержимого (ManifestStaticFilesStorage);
+* кладёт рядом сжатые копии .gz и, если установлен пакет brotli, .br.
+
+Отдаёт собранное core.static_wsgi.StaticFilesApp.
+"""
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    ".css", ".js", ".svg", ".txt", ".html", ".json", ".xml", ".ico", ".map"
+)
+# Мелкие файлы не сжимаем: выигрыш меньше накладных расходов.
+MIN_COMPRESS_SIZE = 256
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9_-]+")
+CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+# Классы в :not() и в атрибутах не требуются для совпадения селектора.
+IGNORED_PARTS_RE = re.compile(r":not\([^)]*\)|\[[^\]]*\]")
+# Правила внутри этих at-правил проверяются так же, как верхнего уровня.
+NESTED_AT_RULES = ("@media", "@supports")
+
+
+def template_tokens(dirs=None):
+    """Все слова из шаблонов проекта.
+
+    Берём не только атрибуты class, а любые слова: так учитываются и
+    классы из {% if %} и из фильтра addclass. Лишние слова ничего
+    не ломают, они просто не совпадут с селекторами.
+    """
+    tokens = set()
+    dirs = dirs or [
+        directory
+        for engine in settings.TEMPLATES
+        for directory in engine.get("DIRS", [])
+    ]
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                with open(os.path.join(root, name), encoding="utf-8") as file:
+                    tokens.update(TOKEN_RE.findall(file.read()))
+    return tokens
+
+
+def _skip(css, i):
+    """Конец строки или комментария, начинающихся в позиции i."""
+    if css[i] in "\"'":
+        quote, i = css[i], i + 1
+        while i < len(css) and css[i] != quote:
+            i += 2 if css[i] == "\\" else 1
+        return i
+    if css.startswith("/*", i):
+        end = css.find("*/", i + 2)
+        return len(css) if end == -1 else end + 1
+    return i
+
+
+def _blocks(css):
+    """Разбивает CSS на пары (прелюдия, тело) верхнего уровня."""
+    blocks = []
+    depth = 0
+    start = body_start = 0
+    i = 0
+    while i < len(css):
+        i = _skip(css, i)
+        char = css[i:i + 1]
+        if char == ";" and depth == 0:
+            # @charset и @import без тела.
+            blocks.append((css[start:i + 1].strip(), None))
+            start = i + 1
+        elif char == "{":
+            if depth == 0:
+                body_start = i
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append(
+                    (css[start:body_start].strip(), css[body_start + 1:i])
+                )
+                start = i + 1
+        i += 1
+    return blocks
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _classes(selector):
+    return set(CLASS_RE.findall(IGNORED_PARTS_RE.sub("", selector)))
+
+
+def _comments(prelude):
+    # Лицензионные комментарии /*! ... */ оставляем.
+    return "".join(re.findall(r"/\*!.*?\*/", prelude, re.S))
+
+
+def purge_css(css, used):
+    """Удаляет правила, все селекторы которых ссылаются на классы
+    не из used. Селекторы без классов остаются."""
+    result = []
+    for prelude, body in _blocks(css):
+        comments = _comments(prelude)
+        prelude = re.sub(r"/\*.*?\*/", "", prelude, flags=re.S).strip()
+        if body is None:
+            result.append(comments + prelude)
+        elif prelude.startswith(NESTED_AT_RULES):
+            body = purge_css(body, used)
+            if body:
+                result.append(f"{comments}{prelude}{{{body}}}")
+        elif prelude.startswith("@"):
+            result.append(f"{comments}{prelude}{{{body}}}")
+        else:
+            selectors = [
+                selector
+                for selector in _split_selectors(prelude)
+                if _classes(selector) <= used
+            ]
+            if selectors:
+                result.append(
+                    f"{comments}{','.join(selectors)}{{{body}}}"
+                )
+            elif comments:
+                result.append(comments)
+    return "".join(result)
+
+
+def compress(path):
+    """Пишет рядом с файлом .gz и .br, если сжатие даёт выигрыш."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    variants = [(".gz", lambda raw: gzip.compress(raw, 9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress))
+    for suffix, compressor in variants:
+        packed = compressor(data)
+        if len(packed) < len(data) * 0.95:
+            with open(path + suffix, "wb") as file:
+                file.write(packed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        paths = self._purge(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        names = set(paths) | set(self.hashed_files.values())
+        for name in names:
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress(self.path(name))
+
+    def _purge(self, paths):
+        targets = [name for name in settings.STATIC_PURGE_CSS if name in paths]
+        if not targets:
+            return paths
+        used = template_tokens() | set(settings.STATIC_PURGE_SAFELIST)
+        paths = dict(paths)
+        for name in targets:
+            storage, path = paths[name]
+            with storage.open(path) as file:
+                css = file.read().decode("utf-8")
+            if self.exists(name):
+                self.delete(name)
+            self.save(name, ContentFile(purge_css(css, used).encode()))
+            # Хэш и копия считаются уже от очищенного файла.
+            paths[name] = (self, name)
+        return paths
@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .metrics import current
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = current.get()
+            if stats is not None:
+                stats.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django с замером времени рендеринга для MetricsMiddleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def warm_up():
+    """Разбирает все шаблоны заранее, чтобы cached loader отдавал их
+    из памяти уже первому запросу. Возвращает число шаблонов."""
+    loaded = 0
+    for backend in engines.all():
+        engine = backend.engine
+        # Каталоги знают вложенные загрузчики cached loader.
+        loaders = []
+        for loader in engine.template_loaders:
+            loaders += getattr(loader, "loaders", [loader])
+        for loader in loaders:
+            for directory in loader.get_dirs():
+                for root, _, files in os.walk(directory):
+                    for name in files:
+                        if not name.endswith((".html", ".txt")):
+                            continue
+                        path = os.path.join(root, name)
+                        try:
+                            engine.get_template(
+                                os.path.relpath(path, directory)
+                            )
+                        except (TemplateDoesNotExist, TemplateSyntaxError):
+                            continue
+                        loaded += 1
+    return loaded
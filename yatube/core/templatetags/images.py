@@ -0,0 +1,18 @@
+from django import template
+
+from core import images
+
+register = template.Library()
+
+
+@register.inclusion_tag("includes/picture.html")
+def picture(image, preset, alt="", css_class="", width="", height=""):
+    """<picture> с WebP и srcset из готовых миниатюр пресета.
+
+    image — поле ImageField или имя файла из статики.
+    """
+    context = images.picture(image, preset)
+    context.update(
+        alt=alt, css_class=css_class, width=width, height=height
+    )
+    return context
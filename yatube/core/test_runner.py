@@ -0,0 +1,134 @@
+"""Тест-раннер manage.py test: параллельный прогон и время тестов.
+
+Тесты идут в TEST_PROCESSES процессах (по умолчанию по числу ядер) или
+в числе из --parallel, каждый со своим клоном тестовой базы. Django 2.2
+умеет это только со стартом процессов через fork; где его нет (macOS,
+Windows), прогон всегда идёт в одном процессе. Тестовая база
+создаётся из шаблона, см. core.db.backends.sqlite3.creation. Время
+каждого теста меряется в процессе, где он выполнялся, и после прогона
+выводятся самые долгие (--durations N, 0 — все).
+
+pytest (tests/) идёт в процессах pytest-xdist (-n auto в pytest.ini) с
+тем же шаблоном базы. Снимки данных mixer/Faker из tests/fixtures не
+сделаны: фикстуры по-прежнему создают строки в каждом тесте.
+"""
+import multiprocessing
+import sys
+import time
+from unittest import TextTestResult
+
+from django.conf import settings
+from django.test.runner import (DebugSQLTextTestResult, DiscoverRunner,
+                                ParallelTestSuite, RemoteTestResult,
+                                RemoteTestRunner, default_test_processes)
+
+DEFAULT_DURATIONS = 10
+
+
+class DurationsMixin:
+    """Запоминает время каждого теста в self.durations."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = {}
+        self._started = None
+
+    def startTest(self, test):
+        self._started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.durations.setdefault(
+            test.id(), time.perf_counter() - self._started
+        )
+
+    def addDuration(self, test, elapsed):
+        # Из дочернего процесса приходит время, замеренное там.
+        self.durations[test.id()] = elapsed
+
+
+class TimedTextTestResult(DurationsMixin, TextTestResult):
+    pass
+
+
+class TimedDebugSQLTextTestResult(DurationsMixin, DebugSQLTextTestResult):
+    pass
+
+
+class TimedRemoteTestResult(RemoteTestResult):
+    def startTest(self, test):
+        self._started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        # Событие воспроизводится в главном процессе после stopTest.
+        elapsed = time.perf_counter() - self._started
+        super().stopTest(test)
+        self.events.append(("addDuration", self.test_index, elapsed))
+
+
+class TimedRemoteTestRunner(RemoteTestRunner):
+    resultclass = TimedRemoteTestResult
+
+
+class TimedParallelTestSuite(ParallelTestSuite):
+    runner_class = TimedRemoteTestRunner
+
+
+class TimedParallelRunner(DiscoverRunner):
+    parallel_test_suite = TimedParallelTestSuite
+
+    def __init__(self, durations=DEFAULT_DURATIONS, parallel=None, **kwargs):
+        explicit = parallel is not None
+        if not explicit:
+            parallel = settings.TEST_PROCESSES or default_test_processes()
+        if parallel > 1 and multiprocessing.get_start_method() != "fork":
+            # Предупреждаем, только если процессы просили явно.
+            if explicit:
+                sys.stderr.write(
+                    "Параллельный прогон требует fork, тесты идут в одном "
+                    "процессе.\n"
+                )
+            parallel = 1
+        super().__init__(parallel=parallel, **kwargs)
+        self.durations = durations
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        # Без --parallel число процессов берётся из TEST_PROCESSES.
+        parser.set_defaults(parallel=None)
+        parser.add_argument(
+            "--durations",
+            type=int,
+            default=DEFAULT_DURATIONS,
+            metavar="N",
+            help="Показать N самых долгих тестов, 0 — все.",
+        )
+
+    def get_resultclass(self):
+        if self.debug_sql:
+            return TimedDebugSQLTextTestResult
+        return TimedTextTestResult
+
+    def run_suite(self, suite, **kwargs):
+        result = super().run_suite(suite, **kwargs)
+        self.report_durations(result)
+        return result
+
+    def report_durations(self, result, stream=None):
+        stream = stream or sys.stderr
+        durations = sorted(
+            result.durations.items(), key=lambda item: item[1], reverse=True
+        )
+        if self.durations:
+            durations = durations[: self.durations]
+        if not durations or self.verbosity < 1:
+            return
+        stream.write(
+            f"\nСамые долгие тесты ({len(durations)} "
+            f"из {len(result.durations)}):\n"
+        )
+        for test_id, elapsed in durations:
+            stream.write(f"{elapsed:8.3f}s {test_id}\n")
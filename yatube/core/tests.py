@@ -0,0 +1,457 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.db.utils import ConnectionHandler
+from django.template import engines
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.db.backends.sqlite3.creation import migrations_digest
+from core.db.pool import ConnectionPool
+from core.db.router import PIN_COOKIE, PrimaryReplicaRouter
+from core.metrics import registry
+from core.static_wsgi import IMMUTABLE, StaticFilesApp
+from core.staticfiles import purge_css
+from core.template_backends import warm_up
+from core.test_runner import (TimedParallelRunner, TimedRemoteTestResult,
+                              TimedTextTestResult)
+from posts.models import Post
+
+User = get_user_model()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rolled_back = False
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_reuses_released_connection(self):
+        """Возвращённое соединение выдаётся снова, откатив транзакцию."""
+        pool = ConnectionPool(max_size=2)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        self.assertTrue(first.rolled_back)
+        self.assertIs(pool.acquire(FakeConnection), first)
+
+    def test_closes_connections_over_max_size(self):
+        pool = ConnectionPool(max_size=1)
+        first = pool.acquire(FakeConnection)
+        second = pool.acquire(FakeConnection)
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(pool.idle, 1)
+        self.assertTrue(second.closed)
+        pool.close_all()
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.idle, 0)
+
+
+class PooledSQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.handler = ConnectionHandler({
+            "default": {
+                "ENGINE": "core.db.backends.sqlite3",
+                "NAME": os.path.join(self.tmp_dir, "db.sqlite3"),
+                "OPTIONS": {
+                    "timeout": 5,
+                    "pool_size": 2,
+                    "pragmas": {"cache_size": -4000},
+                },
+            }
+        })
+        self.connection = self.handler["default"]
+
+    def tearDown(self):
+        self.connection.close()
+        self.connection.pool.close_all()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        """Новое соединение получает WAL, busy timeout и PRAGMA из OPTIONS."""
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("cache_size"), -4000)
+
+    def test_close_returns_connection_to_pool(self):
+        """close() возвращает сырое соединение в пул, а не закрывает его."""
+        self.connection.ensure_connection()
+        raw = self.connection.connection
+        self.connection.close()
+        self.assertEqual(self.connection.pool.idle, 1)
+        self.connection.ensure_connection()
+        self.assertIs(self.connection.connection, raw)
+
+
+class TestDatabaseTemplateTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.test_name = os.path.join(self.tmp_dir, "test.sqlite3")
+        self.handler = ConnectionHandler({
+            "default": {
+                "ENGINE": "core.db.backends.sqlite3",
+                "NAME": os.path.join(self.tmp_dir, "db.sqlite3"),
+                "TEST": {"NAME": self.test_name},
+            }
+        })
+        self.connection = self.handler["default"]
+        self.creation = self.connection.creation
+        settings_override = override_settings(
+            TEST_DB_TEMPLATE_DIR=os.path.join(self.tmp_dir, "templates")
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def tearDown(self):
+        self.connection.close()
+        self.connection.pool.close_all()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_template_named_after_migrations(self):
+        self.assertEqual(migrations_digest(), migrations_digest())
+        self.assertTrue(
+            self.creation.template_path().endswith(
+                f"default-{migrations_digest()}.sqlite3"
+            )
+        )
+
+    def test_save_and_restore_template(self):
+        """Сохранённый шаблон копируется в новую тестовую базу."""
+        self.creation.template = self.creation.template_path()
+        with self.connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE migrated (id integer)")
+            cursor.execute("INSERT INTO migrated VALUES (1)")
+        self.creation.save_template(verbosity=0)
+        self.connection.close()
+        self.connection.pool.close_all()
+        name = self.creation._create_test_db(0, autoclobber=True)
+        self.assertEqual(name, self.test_name)
+        self.assertTrue(self.creation.from_template)
+        with sqlite3.connect(name) as restored:
+            rows = restored.execute("SELECT id FROM migrated").fetchall()
+        self.assertEqual(rows, [(1,)])
+
+
+class TestRunnerProcessesTests(SimpleTestCase):
+    @override_settings(TEST_PROCESSES=0)
+    def test_parallel_by_default(self):
+        """По умолчанию процессов по числу ядер, если есть fork."""
+        with mock.patch(
+            "multiprocessing.get_start_method", return_value="fork"
+        ), mock.patch(
+            "core.test_runner.default_test_processes", return_value=4
+        ):
+            self.assertEqual(TimedParallelRunner().parallel, 4)
+
+    @override_settings(TEST_PROCESSES=0)
+    def test_parallel_needs_fork(self):
+        """Без fork раннер откатывается к одному процессу."""
+        with mock.patch(
+            "multiprocessing.get_start_method", return_value="spawn"
+        ), mock.patch(
+            "core.test_runner.default_test_processes", return_value=4
+        ), mock.patch("sys.stderr") as stderr:
+            self.assertEqual(TimedParallelRunner().parallel, 1)
+            stderr.write.assert_not_called()
+            self.assertEqual(TimedParallelRunner(parallel=4).parallel, 1)
+            stderr.write.assert_called_once()
+
+
+class TestTimingsTests(SimpleTestCase):
+    class Sample(unittest.TestCase):
+        def test_sample(self):
+            pass
+
+    def test_worker_timings_replayed(self):
+        """Время из дочернего процесса заменяет время воспроизведения."""
+        test = self.Sample("test_sample")
+        remote = TimedRemoteTestResult()
+        test.run(remote)
+        self.assertEqual(remote.events[-1][:2], ("addDuration", 0))
+        result = TimedTextTestResult(None, False, 0)
+        result.startTest(test)
+        result.stopTest(test)
+        result.addDuration(test, 1.5)
+        self.assertEqual(result.durations, {test.id(): 1.5})
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """Реплика — отдельный файл SQLite, который не получает записей
+    default, поэтому видно, из какой базы читает view."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = tempfile.mkdtemp()
+        connections.databases["replica"] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.path.join(cls.tmp_dir, "replica.sqlite3"),
+        }
+        call_command("migrate", database="replica", verbosity=0)
+        # bulk_create: сигналы писали бы счётчики в default.
+        author = User.objects.using("replica").bulk_create(
+            [User(id=100, username="replica-author")]
+        )[0]
+        Post.objects.using("replica").bulk_create(
+            [Post(id=1000, text="Пост с реплики", author=author)]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.databases["replica"]
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="Bazz")
+
+    def test_read_views_use_replica(self):
+        Post.objects.create(text="Пост с primary", author=self.user)
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "Пост с реплики")
+        self.assertNotContains(response, "Пост с primary")
+        # Создание поста не в списке DB_REPLICA_VIEWS.
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("posts:post_create"))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_write_pins_browser_to_primary(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("posts:post_create"), {"text": "Свежий пост"}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        post = Post.objects.get(text="Свежий пост")
+        response = self.client.get(
+            reverse("posts:profile", args=["Bazz"])
+        )
+        self.assertContains(response, "Свежий пост")
+        # Без закрепления чтение идёт с отстающей реплики.
+        del self.client.cookies[PIN_COOKIE]
+        response = self.client.get(
+            reverse("posts:post_detail", args=[post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(DATABASE_REPLICAS=["replica", "default"])
+    def test_request_reads_from_one_replica(self):
+        """Реплика выбирается на запрос, а не на каждый SQL-запрос."""
+        chosen = []
+        db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            chosen.append(db_for_read(router, model, **hints))
+            return chosen[-1]
+
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", record):
+            for _ in range(5):
+                chosen.clear()
+                self.client.get(reverse("posts:post_detail", args=[1000]))
+                self.assertTrue(chosen)
+                self.assertEqual(len(set(chosen)), 1)
+
+    def test_replica_render_is_not_cached(self):
+        """Лента с отстающей реплики не ложится в кэш под новую версию."""
+        author = Client()
+        author.force_login(self.user)
+        author.post(reverse("posts:post_create"), {"text": "Свежий пост"})
+        response = self.client.get(reverse("posts:index"))
+        self.assertNotContains(response, "Свежий пост")
+        self.assertNotIn("ETag", response)
+        # Автор закреплён за default и видит свой пост, а не фрагмент,
+        # отрисованный с реплики.
+        response = author.get(reverse("posts:index"))
+        self.assertContains(response, "Свежий пост")
+        self.assertIn("ETag", response)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+    def test_request_metrics_recorded_per_view(self):
+        """Middleware копит время, SQL и рендеринг по имени view."""
+        self.client.get(reverse("posts:index"))
+        self.client.get(reverse("posts:index"))
+        requests = registry.get(
+            "yatube_request_duration_seconds", "posts:index"
+        )
+        self.assertEqual(requests.count, 2)
+        queries = registry.get("yatube_db_queries", "posts:index")
+        self.assertGreaterEqual(queries.sum, 1)
+        render = registry.get("yatube_template_render_seconds", "posts:index")
+        self.assertGreater(render.sum, 0)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.get(reverse("posts:index"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        staff = User.objects.create_user(username="admin", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        body = response.content.decode()
+        self.assertIn("# TYPE yatube_request_duration_seconds histogram", body)
+        self.assertIn(
+            'yatube_db_queries_bucket{view="posts:index",le="+Inf"} 1', body
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint_accepts_token(self):
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class TemplateCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_header_cached_per_user(self):
+        """Закэшированная шапка гостя не достаётся авторизованному."""
+        url = reverse("about:author")
+        self.assertContains(self.client.get(url), "Войти")
+        user = User.objects.create_user(username="Bazz")
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertContains(response, "Пользователь: Bazz")
+        self.assertNotContains(response, "Войти")
+
+    def test_warm_up_fills_cached_loader(self):
+        templates = [{
+            **settings.TEMPLATES[0],
+            "APP_DIRS": False,
+            "OPTIONS": {
+                **settings.TEMPLATES[0]["OPTIONS"],
+                "loaders": [(
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )],
+            },
+        }]
+        with self.settings(TEMPLATES=templates):
+            self.assertGreater(warm_up(), 0)
+            loader = engines.all()[0].engine.template_loaders[0]
+            self.assertIn("posts/index.html", loader.get_template_cache)
+            self.assertIn("admin/base.html", loader.get_template_cache)
+
+
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        with override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE=(
+                "core.staticfiles.CompressedManifestStaticFilesStorage"
+            ),
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+        cls.app = StaticFilesApp(
+            cls.fallback, root=cls.static_root, prefix="/static/"
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @staticmethod
+    def fallback(environ, start_response):
+        start_response("200 OK", [])
+        return [b"django"]
+
+    def get(self, path, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = int(status.split()[0])
+            response["headers"] = dict(headers)
+
+        body = self.app(
+            {"REQUEST_METHOD": "GET", "PATH_INFO": path, **environ},
+            start_response,
+        )
+        response["body"] = b"".join(body)
+        if hasattr(body, "close"):
+            body.close()
+        return response
+
+    def hashed_css(self):
+        with open(os.path.join(self.static_root, "staticfiles.json")) as file:
+            manifest = json.load(file)["paths"]
+        return "/static/" + manifest["css/bootstrap.min.css"]
+
+    def test_purge_css_keeps_used_selectors(self):
+        css = (
+            ".btn,.unused{color:red}.unused:hover{color:blue}"
+            "@media (min-width:1px){.unused{margin:0}.btn:not(.off){}}"
+            "h1{margin:0}"
+        )
+        self.assertEqual(
+            purge_css(css, {"btn"}),
+            ".btn{color:red}@media (min-width:1px){.btn:not(.off){}}"
+            "h1{margin:0}",
+        )
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        url = self.hashed_css()
+        response = self.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["status"], HTTPStatus.OK)
+        self.assertEqual(response["headers"]["Cache-Control"], IMMUTABLE)
+        self.assertEqual(response["headers"]["Content-Encoding"], "gzip")
+        css = gzip.decompress(response["body"]).decode()
+        self.assertIn(".card-header", css)
+        self.assertNotIn(".carousel", css)
+        etag = response["headers"]["ETag"]
+        response = self.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response["status"], HTTPStatus.NOT_MODIFIED)
+
+    def test_unhashed_and_unknown_paths(self):
+        response = self.get("/static/css/bootstrap.min.css")
+        self.assertNotEqual(response["headers"]["Cache-Control"], IMMUTABLE)
+        self.assertNotIn("Content-Encoding", response["headers"])
+        self.assertEqual(self.get("/static/../settings.py")["body"], b"django")
+        self.assertEqual(self.get("/")["body"], b"django")
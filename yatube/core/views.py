@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from .metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _metrics_response():
+    return HttpResponse(
+        registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+@staff_member_required
+def _staff_metrics(request):
+    return _metrics_response()
+
+
+@never_cache
+def metrics(request):
+    # Сборщику метрик вместо сессии администратора можно выдать токен.
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    if token and constant_time_compare(authorization, f"Bearer {token}"):
+        return _metrics_response()
+    return _staff_metrics(request)
@@ -1,9 +1,55 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.urls import NoReverseMatch, reverse
+from django.utils.text import Truncator
 
+from . import search
 from .models import Group, Post
+from .paginators import EstimatedCountPaginator
+
+# Сколько лучших совпадений полнотекстового поиска показывать в админке.
+ADMIN_SEARCH_LIMIT = 1000
+
+
+class LoadedRawIdWidget(ForeignKeyRawIdWidget):
+    """Raw ID виджет, который берёт подпись у уже загруженного объекта.
+
+    Обычный виджет делает на каждую строку списка запрос за подписью.
+    """
+
+    obj = None
+
+    def label_and_url_for_value(self, value):
+        obj = self.obj
+        if obj is None or str(obj.pk) != str(value):
+            return super().label_and_url_for_value(value)
+        opts = obj._meta
+        try:
+            url = reverse(
+                f"{self.admin_site.name}:{opts.app_label}_"
+                f"{opts.model_name}_change",
+                args=(obj.pk,),
+            )
+        except NoReverseMatch:
+            url = ""
+        return Truncator(obj).words(14), url
+
+
+class PostChangeListForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Группа строки уже загружена через list_select_related.
+        widget = self.fields["group"].widget
+        if isinstance(widget, LoadedRawIdWidget) and self.instance.group_id:
+            widget.obj = self.instance.group
 
 
 class PostAdmin(admin.ModelAdmin):
+    """Список постов рассчитан на большую таблицу: автор и группа
+    загружаются JOIN, число строк оценивается без COUNT(*), а поля
+    автора и группы — raw ID без выпадающих списков на каждую строку."""
+
     list_display = (
         "pk",
         "text",
@@ -12,10 +58,38 @@ class PostAdmin(admin.ModelAdmin):
         "group",
     )
     list_editable = ("group",)
+    list_select_related = ("author", "group")
+    raw_id_fields = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
+    # Фильтры по дате — диапазоны pub_date, они идут по индексу; годы
+    # без фильтра — MIN и MAX, см. templates/admin/posts/post.
+    date_hierarchy = "pub_date"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.raw_id_fields:
+            kwargs["widget"] = LoadedRawIdWidget(
+                db_field.remote_field,
+                self.admin_site,
+                using=kwargs.get("using"),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault("form", PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%term%' по search_fields ищем по полнотекстовому
+        # индексу; search_fields нужен, чтобы админка показала поле поиска.
+        if not search_term:
+            return queryset, False
+        post_ids = search.search_ids(search_term, ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=post_ids), False
+
 
 admin.site.register(Group)
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,192 @@
+"""JSON API только для чтения: посты, группы и профили.
+
+Строки читаются через values() и сериализуются без создания моделей.
+Посты берутся и из Post, и из архива ArchivedPost, как на странице
+поста и в профиле. Списки постов листаются курсором ArchivePaginator
+(?cursor=, ?limit=), ?fields= выбирает поля, а /posts/export/ отдаёт
+все посты потоком за постоянную память.
+"""
+import heapq
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from core.query_budget import query_budget
+
+from .archive import ArchivePaginator
+from .models import ArchivedPost, AuthorStats, Group, Post, User
+from .paginators import CursorPage, CursorPaginator, InvalidCursor
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 2000
+
+# Поле ответа -> поле в values().
+POST_FIELDS = {
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "updated": "updated",
+    "author": "author__username",
+    "group": "group__slug",
+}
+GROUP_FIELDS = ("slug", "title", "description", "post_count")
+PROFILE_FIELDS = ("id", "username", "first_name", "last_name")
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={"ensure_ascii": False}
+    )
+
+
+def api_view(view):
+    """Только GET; BadRequest превращается в ответ 400 с JSON."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return _json({"error": str(error)}, status=400)
+    return require_GET(wrapper)
+
+
+def _not_found():
+    return _json({"error": "Не найдено"}, status=404)
+
+
+def _fields(request):
+    """Запрошенные поля поста в порядке POST_FIELDS."""
+    value = request.GET.get("fields")
+    if not value:
+        return list(POST_FIELDS)
+    names = set(value.split(","))
+    unknown = names - POST_FIELDS.keys()
+    if unknown:
+        raise BadRequest(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    return [name for name in POST_FIELDS if name in names]
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", PAGE_SIZE))
+    except ValueError:
+        raise BadRequest("limit должен быть числом")
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def _rows(request, fields, model=Post):
+    """values() постов model с фильтрами ?group=<slug> и
+    ?author=<username>.
+
+    id и pub_date выбираются всегда: по ним строится курсор.
+    """
+    posts = model.objects.all()
+    if "group" in request.GET:
+        posts = posts.filter(group__slug=request.GET["group"])
+    if "author" in request.GET:
+        posts = posts.filter(author__username=request.GET["author"])
+    sources = {"id", "pub_date"} | {POST_FIELDS[name] for name in fields}
+    return posts.values(*sources)
+
+
+def _serialize(row, fields):
+    return {name: row[POST_FIELDS[name]] for name in fields}
+
+
+def _sources(request, fields):
+    return [_rows(request, fields, model) for model in (Post, ArchivedPost)]
+
+
+@query_budget(2)
+@api_view
+def post_list(request):
+    fields = _fields(request)
+    paginator = ArchivePaginator(_sources(request, fields), _limit(request))
+    cursor = request.GET.get("cursor")
+    try:
+        page = paginator.page(cursor)
+    except InvalidCursor:
+        raise BadRequest("Неверный курсор")
+    return _json({
+        "results": [_serialize(row, fields) for row in page],
+        "next_cursor": page.next_cursor,
+        "previous_cursor": page.previous_cursor,
+    })
+
+
+@query_budget(2)
+@api_view
+def post_detail(request, post_id):
+    fields = _fields(request)
+    # Как posts.archive.locate_post: сначала Post, потом архив.
+    for rows in _sources(request, fields):
+        row = rows.filter(pk=post_id).first()
+        if row is not None:
+            return _json(_serialize(row, fields))
+    return _not_found()
+
+
+@api_view
+def post_export(request):
+    """Все посты JSON-массивом, строки читаются и пишутся пачками."""
+    fields = _fields(request)
+    # Обе выборки уже упорядочены, слияние держит в памяти по строке.
+    rows = heapq.merge(
+        *(
+            rows.order_by(*CursorPaginator.ordering).iterator(
+                chunk_size=EXPORT_CHUNK_SIZE
+            )
+            for rows in _sources(request, fields)
+        ),
+        key=CursorPage._key,
+        reverse=True,
+    )
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+    def stream():
+        yield "["
+        separator = ""
+        for row in rows:
+            yield separator + encoder.encode(_serialize(row, fields))
+            separator = ","
+        yield "]"
+
+    return StreamingHttpResponse(
+        stream(), content_type="application/json; charset=utf-8"
+    )
+
+
+@query_budget(1)
+@api_view
+def group_list(request):
+    groups = Group.objects.order_by("title").values(*GROUP_FIELDS)
+    return _json({"results": list(groups)})
+
+
+@query_budget(1)
+@api_view
+def group_detail(request, slug):
+    group = Group.objects.filter(slug=slug).values(*GROUP_FIELDS).first()
+    if group is None:
+        return _not_found()
+    return _json(group)
+
+
+@query_budget(2)
+@api_view
+def profile(request, username):
+    author = (
+        User.objects.filter(username=username).values(*PROFILE_FIELDS).first()
+    )
+    if author is None:
+        return _not_found()
+    author["post_count"] = AuthorStats.post_count_for(author["id"])
+    del author["id"]
+    return _json(author)
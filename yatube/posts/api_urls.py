@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import api
+
+app_name = "api"
+
+urlpatterns = [
+    path("posts/", api.post_list, name="post_list"),
+    path("posts/export/", api.post_export, name="post_export"),
+    path("posts/<int:post_id>/", api.post_detail, name="post_detail"),
+    path("groups/", api.group_list, name="group_list"),
+    path("groups/<slug:slug>/", api.group_detail, name="group_detail"),
+    path("profiles/<str:username>/", api.profile, name="profile"),
+]
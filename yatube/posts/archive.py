@@ -0,0 +1,131 @@
+"""Архив старых постов.
+
+Ленты почти всегда читают свежие посты, поэтому посты старше
+POST_ARCHIVE_AFTER_DAYS команда archive_posts переносит из Post в
+ArchivedPost. Главная и ленты групп работают только с Post и его
+индексами, а страница поста, профиль автора, JSON API и export_posts
+находят и архивные посты. Архив только для чтения: post_edit отвечает
+на архивный пост 404, а ссылку «Редактировать» показывают лишь ленты
+из Post.
+
+Перенос идёт от самых старых постов пачками, каждая — в своей
+транзакции, поэтому прерванная команда продолжает с того же места.
+Счётчики постов архивные посты учитывают; из полнотекстового поиска и
+лент подписок они уходят.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from . import feed_cache, search
+from .models import ArchivedPost, Post, TimelineEntry
+from .paginators import FORWARD, CursorPage, CursorPaginator, decode_cursor
+
+
+def cutoff(days=None):
+    if days is None:
+        days = settings.POST_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def _delete_posts(post_ids):
+    # Без QuerySet.delete(): его сигналы уменьшили бы счётчики постов.
+    table = Post._meta.db_table
+    placeholders = ", ".join(["%s"] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ({placeholders})", post_ids
+        )
+
+
+def archive_batch(before, batch_size=None):
+    """Переносит в архив пачку самых старых постов до before,
+    возвращает их число."""
+    batch_size = batch_size or settings.POST_ARCHIVE_BATCH_SIZE
+    # Чтение до транзакции, как в posts.submissions.drain: транзакция
+    # SQLite должна начинаться с записи.
+    posts = list(
+        Post.objects.filter(pub_date__lt=before).order_by("pub_date", "id")[
+            :batch_size
+        ]
+    )
+    if not posts:
+        return 0
+    post_ids = [post.pk for post in posts]
+    with transaction.atomic():
+        ArchivedPost.objects.bulk_create(
+            (
+                ArchivedPost(
+                    id=post.pk,
+                    text=post.text,
+                    pub_date=post.pub_date,
+                    updated=post.updated,
+                    author_id=post.author_id,
+                    group_id=post.group_id,
+                    image=post.image.name,
+                )
+                for post in posts
+            ),
+            # Повтор после сбоя между транзакциями не падает на дублях.
+            ignore_conflicts=True,
+        )
+        TimelineEntry.objects.filter(post_id__in=post_ids).delete()
+        _delete_posts(post_ids)
+        search.unindex_posts(post_ids)
+    feed_cache.invalidate_post(
+        {post.author_id for post in posts}, {post.group_id for post in posts}
+    )
+    return len(posts)
+
+
+def locate_post(post_id):
+    """Модель, в которой лежит пост (Post или ArchivedPost), дата его
+    изменения и автор; None, если поста нет."""
+    for model in (Post, ArchivedPost):
+        row = (
+            model.objects.filter(pk=post_id)
+            .values_list("updated", "author_id")
+            .first()
+        )
+        if row is not None:
+            return (model, *row)
+    return None
+
+
+def get_post_or_404(post_id, model=None):
+    """Пост по id из Post или из архива.
+
+    model — где пост уже нашёл locate_post, тогда поиск стоит одного
+    запроса.
+    """
+    if model is None:
+        row = locate_post(post_id)
+        if row is None:
+            raise Http404("Пост не найден")
+        model = row[0]
+    return get_object_or_404(model.objects.feed(), pk=post_id)
+
+
+class ArchivePaginator(CursorPaginator):
+    """Курсорная лента из нескольких выборок с одинаковыми полями,
+    например постов автора и его архивных постов.
+
+    Окно за курсором берётся из каждой выборки, строки сливаются по
+    ключу (pub_date, id). Обычно архивные посты старше всех остальных,
+    но посты, загруженные import_posts со старыми датами, слияние тоже
+    расставит правильно.
+    """
+
+    def page(self, cursor=None):
+        direction, key = FORWARD, None
+        if cursor:
+            direction, key = decode_cursor(cursor)
+        rows = []
+        for queryset in self.object_list:
+            rows.extend(self.window(queryset, direction, key))
+        rows.sort(key=CursorPage._key, reverse=direction == FORWARD)
+        return self.make_page(rows[: self.per_page + 1], direction, key)
@@ -0,0 +1,91 @@
+"""Валидаторы условных GET (ETag / Last-Modified) для лент и поста.
+
+Считаются без рендеринга шаблона: для лент из версий posts.feed_cache,
+для поста из его даты изменения. В ETag входит пользователь сессии,
+потому что шапка страницы зависит от авторизации. ETag ленты — только
+версии, поэтому при чтении с реплики его нет: браузер запомнил бы под
+новой версией ленту, отрисованную до последней записи.
+"""
+import hashlib
+
+from django.contrib.auth import SESSION_KEY
+
+from core.db.router import reading_replica
+
+from . import archive, feed_cache, groups
+from .models import User
+
+
+def _etag(request, *parts):
+    viewer = request.session.get(SESSION_KEY, "")
+    raw = ":".join(str(part) for part in (viewer,) + parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _feed_etag(request, view_name, *scopes):
+    if reading_replica():
+        return None
+    cursor = request.GET.get("cursor")
+    key = feed_cache.feed_cache(view_name, cursor, *scopes)["key"]
+    return _etag(request, key)
+
+
+def index_etag(request):
+    return _feed_etag(request, "index", feed_cache.INDEX)
+
+
+def group_etag(request, slug):
+    group = groups.get_by_slug(slug)
+    if group is None:
+        return None
+    return _feed_etag(
+        request, "group_list", feed_cache.group_scope(group.pk)
+    )
+
+
+def profile_author(request, username):
+    """Автор профиля или None. Запоминается на запросе: ETag и view
+    профиля ищут автора одним запросом."""
+    cached = getattr(request, "_profile_author", None)
+    if cached is None or cached[0] != username:
+        author = User.objects.filter(username=username).first()
+        cached = request._profile_author = (username, author)
+    return cached[1]
+
+
+def profile_etag(request, username):
+    author = profile_author(request, username)
+    if author is None:
+        return None
+    return _feed_etag(request, "profile", feed_cache.author_scope(author.pk))
+
+
+def _post_validators(request, post_id):
+    # Запоминаем на запросе, чтобы ETag и Last-Modified стоили одного
+    # запроса к БД.
+    cached = getattr(request, "_post_validators", None)
+    if cached is None or cached[0] != post_id:
+        row = archive.locate_post(post_id)
+        cached = request._post_validators = (post_id, row)
+    return cached[1]
+
+
+def post_model(request, post_id):
+    """Post или ArchivedPost — где лежит пост, см. posts.archive."""
+    row = _post_validators(request, post_id)
+    return row[0] if row else None
+
+
+def post_detail_etag(request, post_id):
+    row = _post_validators(request, post_id)
+    if row is None:
+        return None
+    _, updated, author_id = row
+    # Версия автора меняется вместе со счётчиком его постов на странице.
+    versions = feed_cache.versions(feed_cache.author_scope(author_id))
+    return _etag(request, "post_detail", updated.isoformat(), *versions)
+
+
+def post_detail_last_modified(request, post_id):
+    row = _post_validators(request, post_id)
+    return row[1] if row else None
@@ -0,0 +1,90 @@
+"""Кэш отрисованных лент постов с точечной инвалидацией.
+
+Ключ фрагмента включает версии областей ленты (общая, группа, автор);
+изменение поста увеличивает версии только затронутых областей.
+Запрос, читающий с реплики, берёт готовые фрагменты, но своих не
+кэширует: отстающая реплика отрисовала бы ленту без последней записи
+под уже новой версией.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.db.router import reading_replica
+
+from .paginators import normalize_cursor
+
+GENERATION = "all"
+INDEX = "index"
+
+
+def group_scope(group_id):
+    return f"group:{group_id}"
+
+
+def author_scope(author_id):
+    return f"author:{author_id}"
+
+
+def _cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f"posts:feed-version:{scope}"
+
+
+def _initial_version():
+    # Версия, появившаяся после вытеснения из кэша, должна быть больше
+    # любой из прежних, иначе можно снова попасть на старые фрагменты.
+    return time.time_ns() // 1000
+
+
+def versions(*scopes):
+    cache = _cache()
+    keys = [_version_key(scope) for scope in (GENERATION,) + scopes]
+    found = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in found}
+    for key, version in missing.items():
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+        found[key] = version
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    cache = _cache()
+    for scope in set(scopes):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def feed_cache(view_name, cursor, *scopes):
+    """Контекст для {% cache %} в шаблоне ленты."""
+    parts = [view_name, normalize_cursor(cursor) or ""]
+    parts += [
+        f"{scope}={version}"
+        for scope, version in zip((GENERATION,) + scopes, versions(*scopes))
+    ]
+    return {
+        "alias": settings.FEED_CACHE_ALIAS,
+        # Таймаут 0: {% cache %} прочитает фрагмент, но не сохранит.
+        "timeout": 0 if reading_replica() else settings.FEED_CACHE_TIMEOUT,
+        "key": ":".join(parts),
+    }
+
+
+def invalidate_post(author_ids=(), group_ids=()):
+    scopes = [INDEX]
+    scopes += [author_scope(pk) for pk in author_ids if pk is not None]
+    scopes += [group_scope(pk) for pk in group_ids if pk is not None]
+    bump(*scopes)
+
+
+def invalidate_all():
+    """Сбрасывает все ленты, например после bulk-операций без сигналов."""
+    bump(GENERATION)
@@ -11,3 +11,12 @@ class PostForm(forms.ModelForm):
             "text": "Текст нового поста",
             "group": "Группа, к которой будет относиться пост",
         }
+
+
+class PostImageForm(forms.ModelForm):
+    """Картинка поста отдельной формой, чтобы PostForm не менялась."""
+
+    class Meta:
+        model = Post
+        fields = ["image"]
+        labels = {"image": "Картинка"}
@@ -0,0 +1,63 @@
+"""Каталог групп и кэш групп по слагу.
+
+Число постов и дата последнего поста хранятся в самой Group и
+обновляются сигналами posts.signals, поэтому каталог читает одну
+таблицу групп и не агрегирует посты.
+
+Группы меняются редко, и страница группы с её ETag ищут группу по слагу
+в памяти процесса. Запись живёт GROUP_CACHE_TIMEOUT секунд: изменение
+группы сбрасывает кэш своего процесса, остальные процессы увидят его
+по истечении таймаута. Счётчики в кэш не попадают и читаются из БД при
+обращении.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404
+
+from .models import Group
+
+# Поля, которые кэшируются; остальные отложены.
+CACHED_FIELDS = ("id", "slug", "title", "description")
+
+_lock = threading.Lock()
+_groups = {}
+
+
+def get_by_slug(slug):
+    """Группа по слагу или None. Возвращается копия: отложенные поля,
+    загруженные вызывающим, не попадают в общий кэш."""
+    now = time.monotonic()
+    cached = _groups.get(slug)
+    if cached is None or cached[0] <= now:
+        group = Group.objects.only(*CACHED_FIELDS).filter(slug=slug).first()
+        cached = (now + settings.GROUP_CACHE_TIMEOUT, group)
+        # Промахи не кэшируем: новая группа из другого процесса должна
+        # открываться сразу, а не через таймаут.
+        if group is not None and settings.GROUP_CACHE_TIMEOUT > 0:
+            with _lock:
+                if len(_groups) >= settings.GROUP_CACHE_SIZE:
+                    _groups.clear()
+                _groups[slug] = cached
+    return copy.copy(cached[1])
+
+
+def get_or_404(slug):
+    group = get_by_slug(slug)
+    if group is None:
+        raise Http404("Группа не найдена")
+    return group
+
+
+def forget():
+    with _lock:
+        _groups.clear()
+
+
+def directory():
+    """Группы для каталога: название, слаг и готовые сводные поля."""
+    return Group.objects.only(
+        "id", "slug", "title", "description", "post_count", "last_post_at"
+    ).order_by("title", "id")
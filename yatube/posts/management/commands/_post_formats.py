@@ -0,0 +1,61 @@
+"""Форматы файлов для import_posts / export_posts: JSONL и CSV.
+
+Одна запись — один пост: text, author (username), group (slug или пусто),
+pub_date (ISO 8601).
+"""
+import csv
+import json
+import os
+
+from django.core.management.base import CommandError
+
+FIELDS = ("text", "author", "group", "pub_date")
+FORMATS = ("jsonl", "csv")
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension in FORMATS:
+        return extension
+    raise CommandError(
+        f"Не удалось определить формат {path!r}, укажите --format"
+    )
+
+
+def open_file(path, mode):
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def read_records(stream, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise CommandError(f"Строка {line_number}: {error}")
+
+
+class RecordWriter:
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.writer(stream)
+            self.csv.writerow(FIELDS)
+
+    def write(self, record):
+        if self.fmt == "csv":
+            self.csv.writerow(
+                "" if record[field] is None else record[field]
+                for field in FIELDS
+            )
+        else:
+            # Одна запись — один вызов write, заканчивающийся переводом
+            # строки: так с потоком работает и OutputWrapper команды.
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит посты старше POST_ARCHIVE_AFTER_DAYS в архив пачками. "
+        "Прерванный запуск можно просто повторить"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Возраст поста в днях (POST_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Постов за транзакцию (POST_ARCHIVE_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, days=None, batch_size=None, **options):
+        # Граница фиксируется при старте, чтобы команда закончилась.
+        before = archive.cutoff(days)
+        total = 0
+        while True:
+            moved = archive.archive_batch(before, batch_size)
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f"Перенесено: {total}")
+        self.stdout.write(f"Перенесено в архив постов: {total}")
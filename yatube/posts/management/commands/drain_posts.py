@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import submissions
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит посты из очереди отложенной записи (POST_WRITE_BEHIND) "
+        "в ленты пачками, по транзакции на пачку. Писатель должен быть один"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Постов за одну транзакцию (POST_WRITE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а проверять очередь каждые --interval с",
+        )
+        parser.add_argument("--interval", type=float, default=0.5)
+
+    def handle(self, *args, batch_size=None, loop=False, interval=0.5,
+               **options):
+        while True:
+            written = 0
+            while True:
+                count = submissions.drain(batch_size)
+                written += count
+                if not count:
+                    break
+            if written or not loop:
+                self.stdout.write(f"Записано постов: {written}")
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,60 @@
+import heapq
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+
+from ._post_formats import FORMATS, RecordWriter, detect_format, open_file
+
+
+class Command(BaseCommand):
+    help = "Выгружает посты в JSONL или CSV потоком, не держа их в памяти"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл назначения или - для stdout")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Сколько строк забирать из БД за раз",
+        )
+
+    def handle(self, *args, path, format, batch_size, **options):
+        fmt = detect_format(path, format)
+        # values_list с JOIN: ни одного экземпляра модели, память не растёт
+        # вместе с таблицей. Архив сливается с Post по id, который пост
+        # сохраняет при архивировании.
+        rows = heapq.merge(
+            *(
+                model.objects.order_by("id")
+                .values_list(
+                    "id", "text", "author__username", "group__slug",
+                    "pub_date",
+                )
+                .iterator(chunk_size=batch_size)
+                for model in (Post, ArchivedPost)
+            )
+        )
+        started = time.monotonic()
+        exported = 0
+        stream = self.stdout if path == "-" else open_file(path, "w")
+        try:
+            writer = RecordWriter(stream, fmt)
+            for _, text, author, group, pub_date in rows:
+                writer.write({
+                    "text": text,
+                    "author": author,
+                    "group": group,
+                    "pub_date": pub_date.isoformat(),
+                })
+                exported += 1
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stderr.write(
+            f"Выгружено постов: {exported} за {elapsed:.1f} с "
+            f"({exported / elapsed:.0f} строк/с)"
+        )
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Нарезает недостающие миниатюры картинок постов и статики "
+        "по пресетам THUMBNAIL_PRESETS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help=(
+                "Не завершаться, а каждые --interval с обрабатывать "
+                "добавленные и изменённые посты"
+            ),
+        )
+        parser.add_argument("--interval", type=float, default=10)
+
+    def generate(self, since=None):
+        created = 0
+        if since is None:
+            for name, preset in settings.THUMBNAIL_STATIC_IMAGES.items():
+                created += images.generate(name, preset)
+        posts = Post.objects.exclude(image="").only("id", "image")
+        if since is not None:
+            posts = posts.filter(updated__gte=since)
+        for post in posts.iterator():
+            created += images.generate(post.image, "post")
+        return created
+
+    def handle(self, *args, loop=False, interval=10, **options):
+        since = None
+        while True:
+            started = timezone.now()
+            created = self.generate(since)
+            if created or not loop:
+                self.stdout.write(f"Создано миниатюр: {created}")
+            if not loop:
+                return
+            since = started
+            time.sleep(interval)
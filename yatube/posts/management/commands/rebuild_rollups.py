@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import rollups
+from posts.models import ArchivedPost, AuthorDay, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает дневные свёртки активности авторов по постам, "
+        "например после import_posts или при первом запуске"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--author", help="Пересчитать только этого автора"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Сколько авторов пересчитывать в одной транзакции",
+        )
+
+    def handle(self, *args, author=None, batch_size=100, **options):
+        if author is not None:
+            author_ids = list(
+                User.objects.filter(username=author).values_list(
+                    "id", flat=True
+                )
+            )
+            if not author_ids:
+                raise CommandError(f"Автор {author} не найден")
+        else:
+            author_ids = set()
+            for model in (Post, ArchivedPost, AuthorDay):
+                author_ids.update(
+                    model.objects.order_by()
+                    .values_list("author_id", flat=True)
+                    .distinct()
+                )
+            author_ids = sorted(author_ids)
+        posts = 0
+        for start in range(0, len(author_ids), batch_size):
+            posts += rollups.rebuild(author_ids[start:start + batch_size])
+        self.stdout.write(
+            f"Пересчитано авторов: {len(author_ids)}, постов: {posts}"
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Пересобирает полнотекстовый индекс постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько постов вставлять в индекс за раз",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        with transaction.atomic():
+            indexed = search.rebuild(batch_size)
+        self.stdout.write(f"Проиндексировано постов: {indexed}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import timeline
+from posts.models import Follow, GroupFollow, TimelineEntry, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает ленты подписок, например после bulk-операций: "
+        "bulk_create не раздаёт посты подписчикам"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", help="Пересобрать ленту только этого пользователя"
+        )
+
+    def handle(self, *args, user=None, **options):
+        if user is not None:
+            user_ids = list(
+                User.objects.filter(username=user).values_list("id", flat=True)
+            )
+            if not user_ids:
+                raise CommandError(f"Пользователь {user} не найден")
+        else:
+            user_ids = set()
+            for model in (Follow, GroupFollow, TimelineEntry):
+                user_ids.update(
+                    model.objects.order_by()
+                    .values_list("user_id", flat=True)
+                    .distinct()
+                )
+        for user_id in user_ids:
+            timeline.rebuild(user_id)
+        self.stdout.write(f"Пересобрано лент: {len(user_ids)}")
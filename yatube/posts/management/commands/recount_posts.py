@@ -0,0 +1,79 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from posts.models import ArchivedPost, AuthorStats, Group, Post
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики постов авторов и групп и чинит расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать расхождения, ничего не сохраняя",
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        with transaction.atomic():
+            fixed_groups = self.recount_groups(dry_run)
+            fixed_authors = self.recount_authors(dry_run)
+        verb = "Найдено" if dry_run else "Исправлено"
+        self.stdout.write(
+            f"{verb} расхождений: групп {fixed_groups}, "
+            f"авторов {fixed_authors}"
+        )
+
+    @staticmethod
+    def actual_counts(field):
+        """Число постов и дата последнего по field, включая архив:
+        архивирование счётчики не меняет."""
+        counts = Counter()
+        latest = {}
+        for model in (Post, ArchivedPost):
+            rows = (
+                model.objects.order_by()
+                .values_list(field)
+                .annotate(count=Count("id"), latest=Max("pub_date"))
+            )
+            for key, count, pub_date in rows:
+                counts[key] += count
+                latest[key] = max(latest.get(key, pub_date), pub_date)
+        return counts, latest
+
+    def recount_groups(self, dry_run):
+        counts, latest = self.actual_counts("group")
+        fixed = 0
+        groups = Group.objects.values_list("id", "post_count", "last_post_at")
+        for group_id, post_count, last_post_at in groups.iterator():
+            actual = (counts.get(group_id, 0), latest.get(group_id))
+            if (post_count, last_post_at) == actual:
+                continue
+            fixed += 1
+            if not dry_run:
+                Group.objects.filter(pk=group_id).update(
+                    post_count=actual[0], last_post_at=actual[1]
+                )
+        return fixed
+
+    def recount_authors(self, dry_run):
+        actual, _ = self.actual_counts("author")
+        stored = dict(
+            AuthorStats.objects.values_list("author_id", "post_count")
+        )
+        fixed = 0
+        for author_id in actual.keys() | stored.keys():
+            count = actual.get(author_id, 0)
+            if stored.get(author_id) == count:
+                continue
+            if author_id not in stored and not count:
+                continue
+            fixed += 1
+            if not dry_run:
+                AuthorStats.objects.update_or_create(
+                    author_id=author_id, defaults={"post_count": count}
+                )
+        return fixed
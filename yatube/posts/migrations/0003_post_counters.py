@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    for group in Group.objects.annotate(actual=Count('posts')):
+        Group.objects.filter(pk=group.pk).update(post_count=group.actual)
+    counts = (
+        Post.objects.order_by()
+        .values_list('author')
+        .annotate(count=Count('id'))
+    )
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=author_id, post_count=count)
+        for author_id, count in counts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+INSERT_SQL = f'INSERT INTO {FTS_TABLE} (rowid, stems) VALUES (%s, %s)'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from posts.search import stems
+
+    Post = apps.get_model('posts', 'Post')
+    # remove_diacritics 0: иначе unicode61 превращает «й» в «и».
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+        "stems, tokenize = 'unicode61 remove_diacritics 0')"
+    )
+    posts = Post.objects.order_by().values_list('id', 'text')
+    with schema_editor.connection.cursor() as cursor:
+        batch = []
+        for post_id, text in posts.iterator(chunk_size=1000):
+            batch.append((post_id, ' '.join(stems(text))))
+            if len(batch) == 1000:
+                cursor.executemany(INSERT_SQL, batch)
+                batch = []
+        cursor.executemany(INSERT_SQL, batch)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
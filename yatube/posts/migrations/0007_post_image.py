@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:53
+
+from django.db import migrations
+import sorl.thumbnail.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=sorl.thumbnail.fields.ImageField(blank=True, upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
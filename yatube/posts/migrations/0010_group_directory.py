@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:08
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def fill_last_post_at(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    for group in Group.objects.annotate(latest=Max('posts__pub_date')):
+        Group.objects.filter(pk=group.pk).update(last_post_at=group.latest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_archived_post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата последнего поста'),
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Заголовок'),
+        ),
+        migrations.RunPython(fill_last_post_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_group_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorDay',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='authorday',
+            index=models.Index(fields=['author', 'day'], name='author_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='authorday',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=False), fields=('author', 'day', 'group'), name='unique_author_day_group'),
+        ),
+    ]
@@ -1,18 +1,59 @@
+from contextlib import contextmanager
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from sorl.thumbnail import ImageField
 
 User = get_user_model()
 
 
 class Group(models.Model):
-    title = models.CharField(max_length=200, verbose_name="Заголовок")
+    title = models.CharField(
+        max_length=200, db_index=True, verbose_name="Заголовок"
+    )
     slug = models.SlugField(unique=True, verbose_name="Слаг")
     description = models.TextField(max_length=250, verbose_name="Описание")
+    # Поддерживается сигналами posts.signals, чинится командой recount_posts.
+    post_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество постов"
+    )
+    # Решает, раздавать ли посты группы подписчикам, см. posts.timeline.
+    follower_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество подписчиков"
+    )
+    # Для каталога групп (posts.groups), поддерживается сигналами. Как и
+    # post_count, учитывает архивные посты.
+    last_post_at = models.DateTimeField(
+        null=True, editable=False, verbose_name="Дата последнего поста"
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Выборка для лент: автор и группа одним JOIN, лишние поля отложены.
+
+        Набор полей совпадает с тем, что читают шаблоны лент и страница
+        поста, поэтому страница стоит одного запроса независимо от
+        количества постов на ней.
+        """
+        return self.select_related("author", "group").only(
+            "id",
+            "text",
+            "pub_date",
+            "author",
+            "group",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+            "group__title",
+            "group__slug",
+            "image",
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Текст поста", help_text="Введите текст поста"
@@ -20,6 +61,11 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name="Дата публикации"
     )
+    # В отличие от pub_date меняется при редактировании, служит
+    # валидатором для условных GET.
+    updated = models.DateTimeField(
+        auto_now=True, verbose_name="Дата изменения"
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,9 +80,253 @@ class Post(models.Model):
         verbose_name="Группа",
         help_text="Группа, к которой будет относиться пост",
     )
+    # Миниатюры нарезает команда generate_thumbnails, см. core.images.
+    image = ImageField(
+        upload_to="posts/", blank=True, verbose_name="Картинка"
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-pub_date"]
+        # Индексы повторяют порядок ленты (pub_date, id), чтобы выборки
+        # страниц и подсчёты шли по индексу без сортировки во временном дереве.
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.text
+
+
+@contextmanager
+def keep_dates():
+    """Разрешает сохранить заданные pub_date и updated поста: иначе
+    auto_now_add и auto_now их перезапишут. Меняет поля модели, поэтому
+    нужен только командам, которые пишут посты в одном потоке."""
+    fields = [Post._meta.get_field(name) for name in ("pub_date", "updated")]
+    saved = [(field.auto_now_add, field.auto_now) for field in fields]
+    for field in fields:
+        field.auto_now_add = field.auto_now = False
+    try:
+        yield
+    finally:
+        for field, (auto_now_add, auto_now) in zip(fields, saved):
+            field.auto_now_add, field.auto_now = auto_now_add, auto_now
+
+
+class ArchivedPost(models.Model):
+    """Пост старше POST_ARCHIVE_AFTER_DAYS, перенесённый командой
+    archive_posts. id совпадает с id исходного поста, а поля — с полями
+    Post, поэтому шаблоны показывают оба одинаково."""
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name="Текст поста")
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+    updated = models.DateTimeField(verbose_name="Дата изменения")
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="archived_posts",
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="archived_posts",
+        verbose_name="Группа",
+    )
+    image = ImageField(
+        upload_to="posts/", blank=True, verbose_name="Картинка"
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="archive_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики автора, чтобы не считать его посты."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="post_stats",
+    )
+    post_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество постов"
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество подписчиков"
+    )
+
+    def __str__(self):
+        return f"{self.author_id}: {self.post_count}"
+
+    @classmethod
+    def post_count_for(cls, author_id):
+        count = (
+            cls.objects.filter(author_id=author_id)
+            .values_list("post_count", flat=True)
+            .first()
+        )
+        return count or 0
+
+
+class AuthorDay(models.Model):
+    """Число постов автора за день в группе: основа статистики профиля,
+    см. posts.rollups."""
+
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    day = models.DateField()
+    # После удаления группы её дни сливаются с днями без группы.
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["author", "day", "group"],
+                condition=models.Q(group__isnull=False),
+                name="unique_author_day_group",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["author", "day"], name="author_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} {self.day}: {self.post_count}"
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="follower",
+        verbose_name="Подписчик",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="following",
+        verbose_name="Автор",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_follow"
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F("author")),
+                name="no_self_follow",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.author_id}"
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="group_follows",
+        verbose_name="Подписчик",
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name="followers",
+        verbose_name="Группа",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "group"], name="unique_group_follow"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.group_id}"
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="+"
+    )
+    # Копия Post.pub_date: лента листается по индексу без JOIN с постами.
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_timeline_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_pub_date_idx",
+            ),
+        ]
+
+
+class PendingPost(models.Model):
+    """Пост, ожидающий записи в режиме POST_WRITE_BEHIND.
+
+    Запрос только кладёт строку сюда, а команда drain_posts переносит
+    посты в Post пачками, по одной транзакции на пачку.
+    """
+
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    text = models.TextField()
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.author_id}: {self.text[:30]}"
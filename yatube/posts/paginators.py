@@ -0,0 +1,250 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.db.models import Max, Min, Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+
+# Направления курсора: вперёд (к более старым постам) и назад.
+FORWARD = "n"
+BACKWARD = "p"
+
+
+# Настоящий курсор заметно короче; длинные строки не разбираем.
+MAX_CURSOR_LENGTH = 200
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, key=None):
+    """Упаковывает направление и ключ (pub_date, id) в непрозрачный токен."""
+    payload = [direction]
+    if key is not None:
+        payload += [key[0].isoformat(), key[1]]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _load_payload(token):
+    if len(token) > MAX_CURSOR_LENGTH:
+        raise InvalidCursor(token)
+    padding = "=" * (-len(token) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + padding))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(token)
+    if not isinstance(payload, list) or not payload:
+        raise InvalidCursor(token)
+    return payload
+
+
+def decode_cursor(token):
+    payload = _load_payload(token)
+    direction, key = payload[0], None
+    if direction not in (FORWARD, BACKWARD):
+        raise InvalidCursor(token)
+    if len(payload) == 3:
+        try:
+            pub_date = parse_datetime(payload[1])
+            pk = int(payload[2])
+        except (TypeError, ValueError):
+            raise InvalidCursor(token)
+        if pub_date is None:
+            raise InvalidCursor(token)
+        key = (pub_date, pk)
+    elif len(payload) != 1:
+        raise InvalidCursor(token)
+    return direction, key
+
+
+def normalize_cursor(token):
+    """Каноническая запись курсора или None для пустого и неверного.
+
+    Годится для ключей кэша: неверный курсор даёт первую страницу, как
+    и в get_page, а длина ключа ограничена.
+    """
+    if not token:
+        return None
+    try:
+        direction, key = decode_cursor(token)
+    except InvalidCursor:
+        return None
+    if direction == FORWARD and key is None:
+        return None
+    return encode_cursor(direction, key)
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    Порядок совпадает с Post.Meta.ordering, а id разрешает совпадения
+    дат, поэтому любая страница стоит одного индексного диапазона.
+    """
+
+    ordering = ("-pub_date", "-id")
+
+    def page(self, cursor=None):
+        direction, key = FORWARD, None
+        if cursor:
+            direction, key = decode_cursor(cursor)
+        rows = list(self.window(self.object_list, direction, key))
+        return self.make_page(rows, direction, key)
+
+    def window(self, queryset, direction, key, id_field="id"):
+        """Строки queryset за ключом key, на одну больше размера страницы."""
+        if direction == FORWARD:
+            lookup, ordering = "lt", ("-pub_date", f"-{id_field}")
+        else:
+            lookup, ordering = "gt", ("pub_date", id_field)
+        if key is not None:
+            queryset = queryset.filter(
+                Q(**{f"pub_date__{lookup}": key[0]})
+                | Q(pub_date=key[0], **{f"{id_field}__{lookup}": key[1]})
+            )
+        return queryset.order_by(*ordering)[: self.per_page + 1]
+
+    def make_page(self, rows, direction, key):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == FORWARD:
+            has_next, has_previous = has_more, key is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = key is not None, has_more
+        return CursorPage(rows, self, has_next, has_previous)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return "<Cursor page of %s items>" % len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def _no_numbers(self, *args, **kwargs):
+        raise TypeError(
+            "У курсорной страницы нет номера: используйте next_cursor "
+            "и previous_cursor"
+        )
+
+    next_page_number = previous_page_number = _no_numbers
+    start_index = end_index = _no_numbers
+
+    @staticmethod
+    def _key(obj):
+        # Строки values() из JSON API приходят словарями.
+        if isinstance(obj, dict):
+            return obj["pub_date"], obj["id"]
+        return obj.pub_date, obj.pk
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(FORWARD, self._key(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(BACKWARD, self._key(self.object_list[0]))
+
+    @property
+    def last_cursor(self):
+        return encode_cursor(BACKWARD)
+
+
+class EstimatedPage(Page):
+    """Страница при оценочном числе строк: следующая есть, только если
+    за этой страницей нашлась строка."""
+
+    @cached_property
+    def has_more(self):
+        top = self.number * self.paginator.per_page
+        return self.paginator.object_list[top: top + 1].exists()
+
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для больших таблиц без полного COUNT(*).
+
+    Без фильтров число строк оценивается по диапазону id: MIN и MAX
+    берутся из индекса первичного ключа. После удалений и архивирования
+    оценка больше настоящего числа, и последние страницы по ней пусты.
+    С фильтрами строки считаются точно, но не дальше exact_limit, и
+    упёршийся в предел счёт тоже лишь нижняя граница (capped). В обоих
+    случаях estimated равен True, номер страницы не ограничен сверху,
+    has_next() страницы проверяет, есть ли строка за ней, а шаблон
+    админки ссылается только на соседние страницы.
+    """
+
+    exact_limit = 10_000
+    estimated = False
+    capped = False
+    # Последняя выданная страница: changelist админки хранит только её
+    # строки, а шаблону нужен has_next().
+    current_page = None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            bounds = queryset.order_by().aggregate(
+                first=Min("pk"), last=Max("pk")
+            )
+            if bounds["first"] is None:
+                return 0
+            estimate = bounds["last"] - bounds["first"] + 1
+            if estimate > self.exact_limit:
+                self.estimated = True
+                return estimate
+        count = queryset.order_by()[: self.exact_limit].count()
+        self.estimated = self.capped = count >= self.exact_limit
+        return count
+
+    def validate_number(self, number):
+        if not self.count or not self.estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы должен быть числом")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        # Конец среза не обрезается по count: строк может быть больше.
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom: bottom + self.per_page], number, self
+        )
+
+    def _get_page(self, *args, **kwargs):
+        page_class = EstimatedPage if self.estimated else Page
+        self.current_page = page_class(*args, **kwargs)
+        return self.current_page
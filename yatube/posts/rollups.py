@@ -0,0 +1,130 @@
+"""Статистика активности автора из дневных свёрток.
+
+AuthorDay хранит число постов автора за день в каждой группе и
+обновляется сигналами posts.signals при создании, переносе и удалении
+поста. Статистика профиля — посты по месяцам, активные группы, даты
+первого и последнего поста — считается одним запросом по свёрткам
+автора, число строк в котором зависит от числа месяцев и групп, а не
+постов. Свёртки авторов из import_posts пересчитывает сама команда,
+а для прочих постов, созданных в обход сигналов (bulk_create), и
+данных до появления свёрток есть команда rebuild_rollups.
+Архивирование постов свёртки не меняет, как и счётчики AuthorStats.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedPost, AuthorDay, Post
+
+# Сколько последних месяцев и самых активных групп показывает профиль.
+ACTIVITY_MONTHS = 12
+ACTIVITY_GROUPS = 5
+
+
+def bump(author_id, group_id, pub_date, delta):
+    if author_id is None or not delta:
+        return
+    day = timezone.localdate(pub_date)
+    buckets = AuthorDay.objects.filter(
+        author_id=author_id, group_id=group_id, day=day
+    )
+    if delta < 0:
+        buckets.filter(post_count__gte=-delta).update(
+            post_count=F("post_count") + delta
+        )
+        return
+    if buckets.update(post_count=F("post_count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            AuthorDay.objects.create(
+                author_id=author_id,
+                group_id=group_id,
+                day=day,
+                post_count=delta,
+            )
+    except IntegrityError:
+        # День уже создал параллельный запрос.
+        buckets.update(post_count=F("post_count") + delta)
+
+
+def activity(author_id):
+    """Посты по месяцам, активные группы и даты первого и последнего
+    поста автора."""
+    rows = (
+        AuthorDay.objects.filter(author_id=author_id)
+        .annotate(month=TruncMonth("day"))
+        .values("month", "group_id", "group__title", "group__slug")
+        .annotate(
+            total=Sum("post_count"), first=Min("day"), last=Max("day")
+        )
+        .filter(total__gt=0)
+        .order_by()
+    )
+    months = defaultdict(int)
+    groups = {}
+    first = last = None
+    for row in rows:
+        months[row["month"]] += row["total"]
+        if row["group_id"] is not None:
+            group = groups.setdefault(
+                row["group_id"],
+                {
+                    "title": row["group__title"],
+                    "slug": row["group__slug"],
+                    "count": 0,
+                },
+            )
+            group["count"] += row["total"]
+        first = min(first or row["first"], row["first"])
+        last = max(last or row["last"], row["last"])
+    months = sorted(months.items(), reverse=True)[:ACTIVITY_MONTHS]
+    groups = sorted(
+        groups.values(), key=lambda group: (-group["count"], group["title"])
+    )[:ACTIVITY_GROUPS]
+    return {
+        "months": [
+            {"month": month, "count": count} for month, count in months
+        ],
+        "groups": groups,
+        "first": first,
+        "last": last,
+    }
+
+
+def _counts(model, author_ids):
+    return (
+        model.objects.filter(author_id__in=author_ids)
+        .annotate(day=TruncDate("pub_date"))
+        .values_list("author_id", "day", "group_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+
+def rebuild(author_ids):
+    """Пересчитывает свёртки авторов по постам, включая архивные."""
+    author_ids = list(author_ids)
+    counts = defaultdict(int)
+    # Читаем до транзакции: в SQLite она должна начинаться с записи.
+    for model in (Post, ArchivedPost):
+        for author_id, day, group_id, count in _counts(model, author_ids):
+            counts[author_id, day, group_id] += count
+    with transaction.atomic():
+        AuthorDay.objects.filter(author_id__in=author_ids).delete()
+        AuthorDay.objects.bulk_create(
+            (
+                AuthorDay(
+                    author_id=author_id,
+                    day=day,
+                    group_id=group_id,
+                    post_count=count,
+                )
+                for (author_id, day, group_id), count in counts.items()
+            ),
+            batch_size=500,
+        )
+    return sum(counts.values())
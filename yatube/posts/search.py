@@ -0,0 +1,169 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite посты индексируются в виртуальной таблице FTS5, ранжирование —
+bm25. Текст перед индексацией разбивается на слова и приводится к основам
+русским стеммером (облегчённый Snowball), тем же способом разбирается и
+запрос, поэтому «котами» находит «кот» и «коты». Индекс поддерживается
+сигналами posts.signals и пересобирается командой rebuild_search_index.
+На других СУБД поиск откатывается к icontains.
+"""
+import re
+
+from django.db import connection
+
+from .models import Post
+
+FTS_TABLE = "posts_post_fts"
+
+WORD_RE = re.compile(r"\w+")
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+PERFECTIVE_GERUND = re.compile(
+    r"((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$"
+)
+REFLEXIVE = re.compile(r"(с[яь])$")
+ADJECTIVE = re.compile(
+    r"(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|"
+    r"ую|юю|ая|яя|ою|ею)$"
+)
+PARTICIPLE = re.compile(r"((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$")
+VERB = re.compile(
+    r"((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|"
+    r"ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|"
+    r"((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$"
+)
+NOUN = re.compile(
+    r"(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|"
+    r"ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$"
+)
+RV = re.compile(r"^(.*?[аеиоуыэюя])(.*)$")
+DERIVATIONAL = re.compile(r".*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$")
+DERIVATIONAL_SUFFIX = re.compile(r"ость?$")
+SUPERLATIVE = re.compile(r"(ейше|ейш)$")
+
+
+def stem(word):
+    """Основа русского слова; остальные слова возвращаются как есть."""
+    match = RV.match(word)
+    if not CYRILLIC_RE.search(word) or match is None:
+        return word
+    start, rv = match.groups()
+    stripped = PERFECTIVE_GERUND.sub("", rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE.sub("", rv, 1)
+        stripped = ADJECTIVE.sub("", rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE.sub("", stripped, 1)
+        else:
+            stripped = VERB.sub("", rv, 1)
+            rv = NOUN.sub("", rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+    if rv.endswith("и"):
+        rv = rv[:-1]
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_SUFFIX.sub("", rv, 1)
+    if rv.endswith("ь"):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub("", rv, 1)
+        if rv.endswith("нн"):
+            rv = rv[:-1]
+    return start + rv
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower().replace("ё", "е"))
+
+
+def stems(text):
+    return [stem(word) for word in tokenize(text)]
+
+
+def uses_fts():
+    return connection.vendor == "sqlite"
+
+
+def _insert(cursor, rows):
+    # FTS5 поддерживает REPLACE по rowid: повторная индексация поста
+    # заменяет старую запись.
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, stems) "
+        "VALUES (%s, %s)",
+        rows,
+    )
+
+
+def index_post(post_id, text):
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        _insert(cursor, [(post_id, " ".join(stems(text)))])
+
+
+def unindex_post(post_id):
+    unindex_posts([post_id])
+
+
+def unindex_posts(post_ids):
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(post_id,) for post_id in post_ids],
+        )
+
+
+def index_posts(posts, batch_size=1000):
+    """Индексирует посты из queryset пачками, возвращает их число."""
+    if not uses_fts():
+        return 0
+    indexed = 0
+    rows = posts.order_by().values_list("id", "text")
+    with connection.cursor() as cursor:
+        batch = []
+        for post_id, text in rows.iterator(chunk_size=batch_size):
+            batch.append((post_id, " ".join(stems(text))))
+            if len(batch) >= batch_size:
+                _insert(cursor, batch)
+                indexed += len(batch)
+                batch = []
+        _insert(cursor, batch)
+        indexed += len(batch)
+    return indexed
+
+
+def rebuild(batch_size=1000):
+    """Пересобирает индекс целиком, возвращает число проиндексированных."""
+    if not uses_fts():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    indexed = index_posts(Post.objects.all(), batch_size)
+    with connection.cursor() as cursor:
+        # Сливаем сегменты индекса после массовой вставки.
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+    return indexed
+
+
+def search_ids(query, limit):
+    """id постов, подходящих под все слова запроса, лучшие первыми."""
+    terms = list(dict.fromkeys(stems(query)))
+    if not terms:
+        return []
+    if not uses_fts():
+        posts = Post.objects.all()
+        for word in tokenize(query):
+            posts = posts.filter(text__icontains=word)
+        return list(posts.values_list("id", flat=True)[:limit])
+    match = " ".join(f'"{term}"' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            "ORDER BY rank LIMIT %s",
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,189 @@
+from django.contrib.auth import get_user_model
+from django.db.models import DEFERRED, F, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import feed_cache, groups, rollups, search, timeline
+from .models import (ArchivedPost, AuthorStats, Follow, Group, GroupFollow,
+                     Post)
+
+User = get_user_model()
+
+
+def bump_author(author_id, delta, field="post_count"):
+    if author_id is None or not delta:
+        return
+    counters = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        # Не уходим в минус, если счётчик уже разошёлся с данными.
+        counters = counters.filter(**{f"{field}__gte": -delta})
+    elif not counters.exists():
+        _, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults={field: delta}
+        )
+        if created:
+            return
+    counters.update(**{field: F(field) + delta})
+
+
+def bump_group(group_id, delta, field="post_count"):
+    if group_id is None or not delta:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(**{f"{field}__gte": -delta})
+    groups.update(**{field: F(field) + delta})
+
+
+def group_post_added(group_id, pub_date):
+    if group_id is None:
+        return
+    Group.objects.filter(pk=group_id).filter(
+        Q(last_post_at__isnull=True) | Q(last_post_at__lt=pub_date)
+    ).update(last_post_at=pub_date)
+
+
+def refresh_last_post(group_id, removed_pub_date=None):
+    """Пересчитывает дату последнего поста группы. Если передана дата
+    ушедшего поста, только когда ушёл последний пост.
+
+    Пересчёт читает одну строку по индексу (group, pub_date), а не
+    агрегирует посты группы. Архив старше оставшихся постов, поэтому
+    в него смотрим, только если в группе их не осталось.
+    """
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if removed_pub_date is not None:
+        groups = groups.filter(last_post_at__lte=removed_pub_date)
+    latest = [
+        model.objects.filter(group_id=group_id)
+        .order_by("-pub_date")
+        .values("pub_date")[:1]
+        for model in (Post, ArchivedPost)
+    ]
+    groups.update(
+        last_post_at=Coalesce(*(Subquery(query) for query in latest))
+    )
+
+
+def _remember_saved(instance):
+    # Берём значения из __dict__, чтобы не дёргать отложенные поля:
+    # для них прежнее значение неизвестно, и перенос не учитывается.
+    instance._saved_author_id = instance.__dict__.get("author_id", DEFERRED)
+    instance._saved_group_id = instance.__dict__.get("group_id", DEFERRED)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_relations(sender, instance, **kwargs):
+    _remember_saved(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if raw:
+        return
+    author_ids = {instance.author_id}
+    group_ids = {instance.group_id}
+    if created:
+        bump_author(instance.author_id, 1)
+        bump_group(instance.group_id, 1)
+        group_post_added(instance.group_id, instance.pub_date)
+        rollups.bump(
+            instance.author_id, instance.group_id, instance.pub_date, 1
+        )
+        timeline.fan_out(instance)
+    else:
+        old_author_id = instance._saved_author_id
+        old_group_id = instance._saved_group_id
+        if old_author_id not in (DEFERRED, instance.author_id):
+            bump_author(old_author_id, -1)
+            bump_author(instance.author_id, 1)
+            author_ids.add(old_author_id)
+        if old_group_id not in (DEFERRED, instance.group_id):
+            bump_group(old_group_id, -1)
+            bump_group(instance.group_id, 1)
+            refresh_last_post(old_group_id)
+            refresh_last_post(instance.group_id)
+            group_ids.add(old_group_id)
+        moved_from = (
+            instance.author_id if old_author_id is DEFERRED else old_author_id,
+            instance.group_id if old_group_id is DEFERRED else old_group_id,
+        )
+        if moved_from != (instance.author_id, instance.group_id):
+            rollups.bump(*moved_from, instance.pub_date, -1)
+            rollups.bump(
+                instance.author_id, instance.group_id, instance.pub_date, 1
+            )
+            timeline.post_moved(instance)
+    _remember_saved(instance)
+    feed_cache.invalidate_post(author_ids, group_ids)
+    if update_fields is None or "text" in update_fields:
+        search.index_post(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_author(instance.author_id, -1)
+    bump_group(instance.group_id, -1)
+    pub_date = instance.__dict__.get("pub_date")
+    refresh_last_post(instance.group_id, pub_date)
+    if pub_date is not None:
+        # Без даты день неизвестен, свёртку поправит rebuild_rollups.
+        rollups.bump(instance.author_id, instance.group_id, pub_date, -1)
+    feed_cache.invalidate_post({instance.author_id}, {instance.group_id})
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    bump_author(instance.author_id, 1, "follower_count")
+    timeline.author_followed(instance.user_id, instance.author_id)
+    # Кнопка подписки на странице автора входит в её ETag.
+    feed_cache.bump(feed_cache.author_scope(instance.author_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump_author(instance.author_id, -1, "follower_count")
+    timeline.author_unfollowed(instance.user_id, instance.author_id)
+    feed_cache.bump(feed_cache.author_scope(instance.author_id))
+
+
+@receiver(post_save, sender=GroupFollow)
+def group_follow_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    bump_group(instance.group_id, 1, "follower_count")
+    timeline.group_followed(instance.user_id, instance.group_id)
+    feed_cache.bump(feed_cache.group_scope(instance.group_id))
+
+
+@receiver(post_delete, sender=GroupFollow)
+def group_follow_deleted(sender, instance, **kwargs):
+    bump_group(instance.group_id, -1, "follower_count")
+    timeline.group_unfollowed(instance.user_id, instance.group_id)
+    feed_cache.bump(feed_cache.group_scope(instance.group_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, created=False, raw=False, **kwargs):
+    groups.forget()
+    # Название и слаг группы видны в лентах всех авторов.
+    if not (created or raw):
+        feed_cache.invalidate_all()
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Имя автора выводится в лентах; вход в систему обновляет только
+    # last_login и ленты не меняет.
+    if created or update_fields == frozenset({"last_login"}):
+        return
+    feed_cache.invalidate_all()
@@ -0,0 +1,127 @@
+"""Приём новых постов: защита от повторной отправки, ограничение
+частоты и отложенная запись.
+
+* Форма создания поста несёт одноразовый ключ IDEMPOTENCY_FIELD. Первый
+  POST с ключом занимает его в кэше, повтор (двойной клик, обновление
+  страницы) поста не создаёт.
+* Каждому пользователю выделено ведро токенов в кэше: до
+  POST_RATE_LIMIT_BURST постов подряд, дальше POST_RATE_LIMIT в минуту.
+* При POST_WRITE_BEHIND запрос кладёт пост в PendingPost, а единственный
+  писатель (команда drain_posts) переносит их в Post пачками по
+  POST_WRITE_BATCH_SIZE в одной транзакции. SQLite так тратит одну
+  фиксацию на пачку, а не на пост с его счётчиками и лентами.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import PendingPost, Post, keep_dates
+
+IDEMPOTENCY_FIELD = "idempotency_key"
+# Сколько ждать замок ведра токенов и через сколько секунд он истекает,
+# если процесс упал, не сняв его.
+LOCK_WAIT = 1
+LOCK_TIMEOUT = 5
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def claim_key(user_id, key):
+    """Занимает ключ отправки; False, если пост с ним уже принят."""
+    if not key:
+        return True
+    return cache.add(
+        f"post-submit:{user_id}:{key}", 1, settings.POST_IDEMPOTENCY_TTL
+    )
+
+
+def release_key(user_id, key):
+    if key:
+        cache.delete(f"post-submit:{user_id}:{key}")
+
+
+def _lock(key):
+    """Занимает замок ключа в кэше; False, если не дождались."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(f"{key}:lock", 1, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def take_token(user_id):
+    """Списывает токен из ведра пользователя.
+
+    Возвращает 0, если пост можно принять, иначе через сколько секунд
+    появится следующий токен. Ведро читается и пишется под замком в
+    кэше, иначе параллельные запросы потратят один и тот же токен.
+    """
+    rate = settings.POST_RATE_LIMIT / 60
+    if not rate:
+        return 0
+    burst = settings.POST_RATE_LIMIT_BURST
+    key = f"post-bucket:{user_id}"
+    if not _lock(key):
+        # Замок держит другой запрос того же пользователя: пусть клиент
+        # повторит отправку через секунду.
+        return 1
+    try:
+        now = time.time()
+        tokens, stamp = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - stamp) * rate)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        # Ключ истекает, когда ведро успело бы наполниться заново.
+        cache.set(key, (tokens, now), int(burst / rate) + 1)
+    finally:
+        cache.delete(f"{key}:lock")
+    return wait
+
+
+def submit(post):
+    """Сохраняет пост сразу или ставит в очередь отложенной записи."""
+    if not settings.POST_WRITE_BEHIND or post.image:
+        # Файл картинки сохраняется вместе с постом, в очередь он не идёт.
+        post.save()
+        return post
+    return PendingPost.objects.create(
+        author_id=post.author_id, text=post.text, group_id=post.group_id
+    )
+
+
+def drain(batch_size=None):
+    """Переносит пачку постов из очереди в Post, возвращает их число.
+
+    Посты сохраняются через save(), поэтому сигналы обновляют счётчики,
+    поиск и ленты подписок как обычно, но всё в одной транзакции. Датой
+    поста становится время отправки, а не время записи.
+    """
+    batch_size = batch_size or settings.POST_WRITE_BATCH_SIZE
+    # Очередь читается до транзакции: транзакция SQLite, начатая с чтения,
+    # не может дождаться блокировки записи и сразу получает
+    # "database is locked". Повторно взять пачку некому: писатель один.
+    pending = list(PendingPost.objects.order_by("id")[:batch_size])
+    if not pending:
+        return 0
+    with transaction.atomic(), keep_dates():
+        for item in pending:
+            Post.objects.create(
+                author_id=item.author_id,
+                text=item.text,
+                group_id=item.group_id,
+                pub_date=item.created,
+                updated=item.created,
+            )
+        PendingPost.objects.filter(
+            pk__in=[item.pk for item in pending]
+        ).delete()
+    return len(pending)
@@ -0,0 +1,46 @@
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db.models import Max, Min
+from django.utils import timezone
+
+register = template.Library()
+
+
+def post_date_hierarchy(cl):
+    """date_hierarchy админки, но годы без фильтра по дате берутся из
+    MIN и MAX pub_date по индексу, а не DISTINCT по всем постам."""
+    field = cl.date_hierarchy
+    if any(param.startswith(f"{field}__") for param in cl.params):
+        return date_hierarchy(cl)
+    bounds = cl.queryset.aggregate(first=Min(field), last=Max(field))
+    years = ()
+    if bounds["first"] is not None:
+        years = range(
+            timezone.localtime(bounds["first"]).year,
+            timezone.localtime(bounds["last"]).year + 1,
+        )
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {
+                "link": cl.get_query_string(
+                    {f"{field}__year": str(year)}, [f"{field}__"]
+                ),
+                "title": str(year),
+            }
+            for year in years
+        ],
+    }
+
+
+@register.tag(name="post_date_hierarchy")
+def post_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=post_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
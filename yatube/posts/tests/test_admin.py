@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import PostAdmin
+from ..models import Group, Post
+from ..paginators import EstimatedCountPaginator
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        cls.groups = [
+            Group.objects.create(title=f"Группа {i}", slug=f"group-{i}")
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_posts(self, count):
+        start = Post.objects.count()
+        for i in range(count):
+            author = User.objects.create(username=f"author{start + i}")
+            Post.objects.create(
+                text=f"Пост {i}", author=author, group=self.groups[i % 5]
+            )
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse("admin:posts_post_changelist"), params
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Число запросов страницы списка не зависит от числа строк."""
+        self.add_posts(3)
+        _, few = self.changelist_queries()
+        self.add_posts(30)
+        response, many = self.changelist_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(many, 6)
+        self.assertContains(response, "Группа 1")
+        self.assertNotContains(response, "<select name=\"form-0-group\"")
+
+    def test_date_hierarchy_filters_by_range(self):
+        self.add_posts(2)
+        post = Post.objects.first()
+        response, _ = self.changelist_queries(
+            pub_date__year=post.pub_date.year,
+            pub_date__month=post.pub_date.month,
+        )
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+    def test_estimated_count(self):
+        self.add_posts(3)
+        Post.objects.filter(pk=Post.objects.order_by("pk")[1].pk).delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        paginator.exact_limit = 1
+        # Оценка по диапазону id не меньше настоящего числа строк.
+        self.assertEqual(paginator.count, 3)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(group=self.groups[0]), 10
+        )
+        self.assertEqual(filtered.count, 1)
+
+    @mock.patch.object(EstimatedCountPaginator, "exact_limit", 1)
+    def test_estimated_count_links_only_existing_pages(self):
+        """Оценка по id больше числа постов после удалений: пустые
+        последние страницы не предлагаются."""
+        self.add_posts(8)
+        pks = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+        Post.objects.filter(pk__in=pks[2:6]).delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 8)
+        self.assertTrue(paginator.estimated)
+        self.assertTrue(paginator.page(1).has_next())
+        self.assertFalse(paginator.page(2).has_next())
+        with mock.patch.object(PostAdmin, "list_per_page", 2):
+            response, _ = self.changelist_queries()
+            self.assertContains(response, 'href="?p=1"')
+            self.assertNotContains(response, 'href="?p=3"')
+            response, _ = self.changelist_queries(p=1)
+        self.assertContains(response, 'href="?p=0"')
+        self.assertNotContains(response, 'href="?p=2"')
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+
+    @mock.patch.object(EstimatedCountPaginator, "exact_limit", 5)
+    def test_capped_count_keeps_later_pages(self):
+        """Счёт с фильтром упёрся в exact_limit: дальние страницы всё
+        равно открываются, а следующая определяется по строкам."""
+        self.add_posts(15)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(text__startswith="Пост").order_by("pk"), 3
+        )
+        self.assertEqual(paginator.count, 5)
+        self.assertTrue(paginator.capped)
+        self.assertTrue(paginator.page(4).has_next())
+        self.assertEqual(len(paginator.page(5).object_list), 3)
+        self.assertFalse(paginator.page(5).has_next())
+        response, _ = self.changelist_queries(q="", author__id__gte=0)
+        self.assertContains(response, "не меньше 5")
+
+    def test_date_hierarchy_years_without_distinct(self):
+        self.add_posts(2)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse("admin:posts_post_changelist")
+            )
+        year = Post.objects.first().pub_date.year
+        self.assertContains(response, f"?pub_date__year={year}")
+        for query in ctx.captured_queries:
+            self.assertNotIn("DISTINCT", query["sql"])
@@ -0,0 +1,94 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetMixin
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="Bazz")
+        cls.group = Group.objects.create(
+            title="Группа", slug="test-slug", description="Описание"
+        )
+        for i in range(25):
+            Post.objects.create(
+                text=f"Пост {i}", author=cls.user, group=cls.group
+            )
+        cls.post = Post.objects.create(text="Без группы", author=cls.user)
+
+    def get_json(self, url, data=None):
+        response = self.assertWithinQueryBudget(url, data=data)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.json()
+
+    def test_post_list_cursor_paging(self):
+        """Курсор обходит все посты без повторов в порядке ленты."""
+        url = reverse("api:post_list")
+        seen = []
+        data = {"limit": 10}
+        while True:
+            page = self.get_json(url, data)
+            seen += [post["id"] for post in page["results"]]
+            if page["next_cursor"] is None:
+                break
+            data["cursor"] = page["next_cursor"]
+        expected = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_fields_selection(self):
+        page = self.get_json(
+            reverse("api:post_list"), {"fields": "text,author", "limit": 1}
+        )
+        self.assertEqual(
+            page["results"], [{"text": "Без группы", "author": "Bazz"}]
+        )
+        response = self.client.get(
+            reverse("api:post_list"), {"fields": "text,password"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_filters_and_detail(self):
+        page = self.get_json(
+            reverse("api:post_list"), {"group": "test-slug", "limit": 100}
+        )
+        self.assertEqual(len(page["results"]), 25)
+        post = self.get_json(
+            reverse("api:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        self.assertEqual(post["group"], None)
+        self.assertEqual(post["author"], "Bazz")
+        response = self.client.get(
+            reverse("api:post_detail", kwargs={"post_id": 0})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_groups_and_profile(self):
+        groups = self.get_json(reverse("api:group_list"))["results"]
+        self.assertEqual(groups[0]["slug"], "test-slug")
+        self.assertEqual(groups[0]["post_count"], 25)
+        profile = self.get_json(
+            reverse("api:profile", kwargs={"username": "Bazz"})
+        )
+        self.assertEqual(profile["post_count"], 26)
+
+    def test_export_streams_all_posts(self):
+        response = self.client.get(
+            reverse("api:post_export"), {"fields": "id"}
+        )
+        self.assertTrue(response.streaming)
+        posts = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(posts), 26)
+        self.assertEqual(posts[0], {"id": self.post.pk})
@@ -0,0 +1,147 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.query_budget import QueryBudgetMixin
+
+from .. import search
+from ..models import ArchivedPost, AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="Bazz")
+        old = timezone.now() - timedelta(days=400)
+        for i in range(12):
+            post = Post.objects.create(
+                text=f"Старый пост {i}", author=cls.author
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old + timedelta(minutes=i)
+            )
+        cls.fresh = Post.objects.create(text="Свежий пост", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_posts", *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_posts_in_batches(self):
+        output = self.archive("--batch-size", "5")
+        self.assertIn("Перенесено в архив постов: 12", output)
+        self.assertEqual(list(Post.objects.all()), [self.fresh])
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        # Счётчик учитывает и архивные посты.
+        self.assertEqual(AuthorStats.post_count_for(self.author.pk), 13)
+        self.assertIn("Перенесено в архив постов: 0", self.archive())
+
+    def test_recount_keeps_archived_posts(self):
+        """recount_posts считает и архив, поэтому после архивирования
+        не находит расхождений."""
+        group = Group.objects.create(title="Группа", slug="group")
+        old = list(Post.objects.order_by("pub_date")[:2])
+        Post.objects.filter(pk__in=[post.pk for post in old]).update(
+            group=group
+        )
+        Group.objects.filter(pk=group.pk).update(
+            post_count=2, last_post_at=old[1].pub_date
+        )
+        self.archive()
+        out = StringIO()
+        call_command("recount_posts", stdout=out)
+        self.assertIn("групп 0, авторов 0", out.getvalue())
+        self.assertEqual(AuthorStats.post_count_for(self.author.pk), 13)
+        group.refresh_from_db()
+        self.assertEqual(group.post_count, 2)
+        self.assertEqual(group.last_post_at, old[1].pub_date)
+
+    def test_last_post_at_falls_back_to_archive(self):
+        group = Group.objects.create(title="Группа", slug="group")
+        Post.objects.filter(text="Старый пост 3").update(group=group)
+        archived = Post.objects.get(text="Старый пост 3").pub_date
+        self.archive()
+        post = Post.objects.create(
+            text="Новый", author=self.author, group=group
+        )
+        post.delete()
+        group.refresh_from_db()
+        self.assertEqual(group.last_post_at, archived)
+
+    def test_archived_post_detail(self):
+        post_id = Post.objects.order_by("pub_date").first().pk
+        self.archive()
+        url = reverse("posts:post_detail", args=[post_id])
+        response = self.assertWithinQueryBudget(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context["post_alone"].text, "Старый пост 0")
+        self.assertIn("ETag", response)
+        self.assertEqual(search.search_ids("старый", 10), [])
+
+    def test_profile_pages_through_archive(self):
+        self.archive()
+        url = reverse("posts:profile", args=["Bazz"])
+        first = self.assertWithinQueryBudget(url).context["page_obj"]
+        self.assertEqual(first[0], self.fresh)
+        second = self.client.get(url, {"cursor": first.next_cursor})
+        texts = [post.text for post in first] + [
+            post.text for post in second.context["page_obj"]
+        ]
+        self.assertEqual(texts[-1], "Старый пост 0")
+        self.assertEqual(len(texts), 13)
+        self.assertFalse(second.context["page_obj"].has_next())
+
+    def test_index_reads_only_hot_posts(self):
+        self.archive()
+        page = self.client.get(reverse("posts:index")).context["page_obj"]
+        self.assertEqual(list(page), [self.fresh])
+
+    def test_api_reads_archive(self):
+        post_id = Post.objects.order_by("pub_date").first().pk
+        self.archive()
+        url = reverse("api:post_detail", args=[post_id])
+        response = self.assertWithinQueryBudget(url)
+        self.assertEqual(response.json()["text"], "Старый пост 0")
+        url = reverse("api:post_list")
+        first = self.assertWithinQueryBudget(
+            url, data={"author": "Bazz", "limit": 10}
+        ).json()
+        second = self.client.get(url, {
+            "author": "Bazz", "limit": 10, "cursor": first["next_cursor"]
+        }).json()
+        texts = [row["text"] for row in first["results"] + second["results"]]
+        self.assertEqual(texts[0], "Свежий пост")
+        self.assertEqual(texts[-1], "Старый пост 0")
+        self.assertEqual(len(texts), 13)
+        response = self.client.get(reverse("api:post_export"))
+        exported = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(exported), 13)
+        self.assertEqual(exported[1]["text"], "Старый пост 11")
+
+    def test_export_command_includes_archive(self):
+        self.archive()
+        out = StringIO()
+        call_command("export_posts", "-", format="jsonl", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 13)
+        self.assertEqual(json.loads(lines[0])["text"], "Старый пост 0")
+
+    def test_archived_post_is_read_only(self):
+        post_id = Post.objects.order_by("pub_date").first().pk
+        self.archive()
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("posts:post_edit", args=[post_id]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="Bazz")
+        cls.group = Group.objects.create(title="Группа", slug="test-slug")
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = [
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "test-slug"}),
+            reverse("posts:profile", kwargs={"username": "Bazz"}),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+        ]
+
+    def edit_post(self):
+        self.authorized_client.post(
+            reverse("posts:post_edit", kwargs={"post_id": self.post.pk}),
+            {"text": "Исправленный пост", "group": self.group.pk},
+        )
+
+    def test_matching_etag_returns_304(self):
+        """Совпавший ETag отдаёт 304 без тела."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                etag = response["ETag"]
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                self.assertEqual(response.content, b"")
+
+    def test_edit_changes_etag(self):
+        """Редактирование поста меняет валидаторы всех его страниц."""
+        etags = {url: self.guest_client.get(url)["ETag"] for url in self.urls}
+        self.edit_post()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и автор получают разные ETag: шапка страницы разная."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.guest_client.get(url)["ETag"],
+                    self.authorized_client.get(url)["ETag"],
+                )
+
+    def test_post_detail_last_modified(self):
+        """Страница поста отдаёт Last-Modified по дате изменения."""
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        response = self.guest_client.get(url)
+        self.assertEqual(
+            response["Last-Modified"],
+            http_date(self.post.updated.timestamp()),
+        )
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_post_edit_updates_modification_date(self):
+        self.edit_post()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertGreater(post.updated, self.post.updated)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+
+    def test_profile_looks_up_author_once(self):
+        """ETag и view профиля ищут автора по username одним запросом."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.guest_client.get(self.urls[2])
+        self.assertEqual(response.context["author"], self.user)
+        lookups = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if '"auth_user"."username" =' in query["sql"]
+        ]
+        self.assertEqual(len(lookups), 1)
+        response = self.guest_client.get(
+            reverse("posts:profile", kwargs={"username": "nobody"})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
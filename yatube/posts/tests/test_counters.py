@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class PostCountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="Bazz")
+        cls.other = User.objects.create(username="Woody")
+        cls.group = Group.objects.create(title="Первая", slug="first")
+        cls.other_group = Group.objects.create(title="Вторая", slug="second")
+
+    def assertCounts(self, author=None, other=None, group=None, other_g=None):
+        expected = {
+            self.author.pk: author,
+            self.other.pk: other,
+        }
+        for author_id, count in expected.items():
+            if count is not None:
+                self.assertEqual(AuthorStats.post_count_for(author_id), count)
+        groups = {self.group.pk: group, self.other_group.pk: other_g}
+        for group_id, count in groups.items():
+            if count is not None:
+                self.assertEqual(
+                    Group.objects.get(pk=group_id).post_count, count
+                )
+
+    def test_create_and_delete(self):
+        """Счётчики растут при создании поста и падают при удалении."""
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group
+        )
+        Post.objects.create(text="Без группы", author=self.author)
+        self.assertCounts(author=2, group=1)
+        post.delete()
+        self.assertCounts(author=1, group=0)
+
+    def test_author_and_group_change(self):
+        """Перенос поста к другому автору и в другую группу."""
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group
+        )
+        post.author = self.other
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(author=0, other=1, group=0, other_g=1)
+        post.group = None
+        post.save()
+        self.assertCounts(other=1, group=0, other_g=0)
+
+    def test_edit_without_move_keeps_counts(self):
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group
+        )
+        post = Post.objects.feed().get(pk=post.pk)
+        post.text = "Новый текст"
+        post.save()
+        self.assertCounts(author=1, group=1)
+
+    def test_group_delete_keeps_author_count(self):
+        """Удаление группы (SET_NULL) не трогает счётчик автора."""
+        group = Group.objects.create(title="Временная", slug="temporary")
+        Post.objects.create(text="Пост", author=self.author, group=group)
+        group.delete()
+        self.assertCounts(author=1, group=0, other_g=0)
+        self.assertEqual(Post.objects.filter(group=None).count(), 1)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount_posts чинит счётчики после bulk-операций."""
+        Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=self.other, group=self.other_group)
+            for i in range(3)
+        )
+        Post.objects.create(text="Пост", author=self.author, group=self.group)
+        Group.objects.filter(pk=self.group.pk).update(post_count=7)
+        out = StringIO()
+        call_command("recount_posts", stdout=out)
+        self.assertIn("групп 2, авторов 1", out.getvalue())
+        self.assertCounts(author=1, other=3, group=1, other_g=3)
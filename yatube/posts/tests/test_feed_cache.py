@@ -0,0 +1,137 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedCacheMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="Bazz")
+        cls.other = User.objects.create(username="Woody")
+        cls.group = Group.objects.create(title="Первая", slug="first")
+        cls.other_group = Group.objects.create(title="Вторая", slug="second")
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.user, group=cls.group
+        )
+        Post.objects.create(
+            text="Чужой пост", author=cls.other, group=cls.other_group
+        )
+        cls.urls = {
+            "index": reverse("posts:index"),
+            "group": reverse("posts:group_list", kwargs={"slug": "first"}),
+            "other_group": reverse(
+                "posts:group_list", kwargs={"slug": "second"}
+            ),
+            "profile": reverse("posts:profile", kwargs={"username": "Bazz"}),
+            "other_profile": reverse(
+                "posts:profile", kwargs={"username": "Woody"}
+            ),
+        }
+
+    def setUp(self):
+        caches["default"].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed_rendered(self, url):
+        """Рендерилась ли лента заново, то есть был ли запрос к постам."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return any(
+            'FROM "posts_post"' in query["sql"]
+            for query in ctx.captured_queries
+        )
+
+    def warm_up(self):
+        for url in self.urls.values():
+            self.feed_rendered(url)
+
+    def assertEvicted(self, *names):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertEqual(self.feed_rendered(url), name in names)
+
+    def test_second_request_is_served_from_cache(self):
+        """Повторный запрос ленты не обращается к таблице постов."""
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.assertTrue(self.feed_rendered(url))
+                self.assertFalse(self.feed_rendered(url))
+
+    def test_post_create_evicts_only_affected_feeds(self):
+        self.warm_up()
+        self.authorized_client.post(
+            reverse("posts:post_create"),
+            {"text": "Новый пост", "group": self.group.pk},
+        )
+        self.assertEvicted("index", "group", "profile")
+        response = self.guest_client.get(self.urls["group"])
+        self.assertContains(response, "Новый пост")
+
+    def test_post_edit_evicts_old_and_new_group(self):
+        self.warm_up()
+        self.authorized_client.post(
+            reverse("posts:post_edit", kwargs={"post_id": self.post.pk}),
+            {"text": "Перенесённый пост", "group": self.other_group.pk},
+        )
+        self.assertEvicted("index", "group", "other_group", "profile")
+
+    def test_admin_change_evicts_feeds(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        self.warm_up()
+        admin_client = Client()
+        admin_client.force_login(admin)
+        admin_client.post(
+            reverse("admin:posts_post_change", args=(self.post.pk,)),
+            {
+                "text": "Исправлено админом",
+                "author": self.user.pk,
+                "group": self.group.pk,
+            },
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).text, "Исправлено админом"
+        )
+        self.assertEvicted("index", "group", "profile")
+
+
+class LocMemFeedCacheTests(FeedCacheMixin, TestCase):
+    pass
+
+
+class FileBasedFeedCacheTests(FeedCacheMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.cache_settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": cls.cache_dir,
+                }
+            }
+        )
+        cls.cache_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.cache_settings.disable()
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.query_budget import QueryBudgetMixin
+
+from .. import groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="Bazz")
+        cls.group = Group.objects.create(title="Первая", slug="first")
+        cls.other_group = Group.objects.create(title="Вторая", slug="second")
+
+    def setUp(self):
+        groups.forget()
+        self.client.force_login(self.author)
+
+    def last_post_at(self, group):
+        return Group.objects.get(pk=group.pk).last_post_at
+
+    def post(self, group, days_ago=0):
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=group
+        )
+        if days_ago:
+            # Сдвиг даты как при импорте: сигналы не срабатывают.
+            pub_date = post.pub_date - timedelta(days=days_ago)
+            Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+            post.pub_date = pub_date
+        return post
+
+    def test_last_post_at_follows_posts(self):
+        """Дата последнего поста обновляется при создании, удалении
+        и переносе постов."""
+        self.assertIsNone(self.last_post_at(self.group))
+        older = self.post(self.group, days_ago=1)
+        Group.objects.filter(pk=self.group.pk).update(
+            last_post_at=older.pub_date
+        )
+        newer = self.post(self.group)
+        self.assertEqual(self.last_post_at(self.group), newer.pub_date)
+        older.delete()
+        self.assertEqual(self.last_post_at(self.group), newer.pub_date)
+        newer.group = self.other_group
+        newer.save()
+        self.assertIsNone(self.last_post_at(self.group))
+        self.assertEqual(self.last_post_at(self.other_group), newer.pub_date)
+        newer.delete()
+        self.assertIsNone(self.last_post_at(self.other_group))
+
+    def test_directory_reads_only_groups(self):
+        """Каталог не обращается к таблице постов."""
+        post = self.post(self.group)
+        url = reverse("posts:group_index")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.assertWithinQueryBudget(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        post_table = Post._meta.db_table
+        for query in ctx.captured_queries:
+            self.assertNotIn(post_table, query["sql"])
+        page = list(response.context["page_obj"])
+        self.assertEqual(page, [self.other_group, self.group])
+        self.assertEqual(page[1].post_count, 1)
+        self.assertEqual(page[1].last_post_at, post.pub_date)
+        self.assertContains(
+            response, reverse("posts:group_list", args=["first"])
+        )
+
+    def test_slug_lookup_cached_in_process(self):
+        self.assertEqual(groups.get_by_slug("first"), self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get_by_slug("first"), self.group)
+        self.group.title = "Новое название"
+        self.group.save()
+        self.assertEqual(groups.get_by_slug("first").title, "Новое название")
+
+    def test_missing_slug_not_cached(self):
+        """Группа, созданная в другом процессе, видна сразу."""
+        self.assertIsNone(groups.get_by_slug("new"))
+        # Прямая вставка без сигналов, как запись из другого процесса.
+        Group.objects.bulk_create([Group(title="Новая", slug="new")])
+        self.assertEqual(groups.get_by_slug("new").title, "Новая")
+
+    @override_settings(GROUP_CACHE_TIMEOUT=0)
+    def test_slug_cache_disabled(self):
+        groups.get_by_slug("first")
+        with self.assertNumQueries(1):
+            groups.get_by_slug("first")
+
+    def test_cached_group_reads_fresh_counters(self):
+        groups.get_by_slug("first")
+        self.post(self.group)
+        self.assertEqual(groups.get_by_slug("first").post_count, 1)
+
+    def test_recount_repairs_last_post_at(self):
+        post = self.post(self.group)
+        Group.objects.filter(pk=self.group.pk).update(
+            last_post_at=timezone.now() - timedelta(days=3)
+        )
+        call_command("recount_posts", stdout=StringIO())
+        self.assertEqual(self.last_post_at(self.group), post.pub_date)
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import images
+from posts.models import Post
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(name="post.jpg", size=(400, 200)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="Bazz")
+        self.client.force_login(self.user)
+
+    def create_post(self):
+        self.client.post(
+            reverse("posts:post_create"),
+            {"text": "Пост с картинкой", "image": image_file()},
+        )
+        return Post.objects.get()
+
+    def test_create_with_image(self):
+        post = self.create_post()
+        self.assertTrue(post.image.name.startswith("posts/"))
+        response = self.client.get(
+            reverse("posts:post_detail", args=[post.pk])
+        )
+        # Миниатюры ещё не нарезаны: в запросе они не создаются.
+        self.assertContains(response, f'src="{post.image.url}"')
+        self.assertNotContains(response, "image/webp")
+
+    def test_generate_thumbnails(self):
+        post = self.create_post()
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        # 3 ширины логотипа и 3 ширины поста, каждая в двух форматах.
+        self.assertIn("Создано миниатюр: 12", out.getvalue())
+        context = images.picture(post.image, "post")
+        # Без увеличения 960 и 640 урезаны до исходных 400 пикселей.
+        self.assertEqual(
+            [part.split()[1] for part in context["srcset"].split(", ")],
+            ["320w", "400w"],
+        )
+        self.assertIn(".webp 400w", context["webp"])
+        response = self.client.get(
+            reverse("posts:post_detail", args=[post.pk])
+        )
+        self.assertContains(response, 'type="image/webp"')
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Создано миниатюр: 0", out.getvalue())
+
+    def test_missing_thumbnails_are_cached(self):
+        """Картинка без миниатюр не ходит в базу на каждый рендер, а
+        нарезанные миниатюры видны сразу."""
+        images.picture("img/logo.png", "logo")
+        with self.assertNumQueries(0):
+            context = images.picture("img/logo.png", "logo")
+        self.assertEqual(context["srcset"], "")
+        images.generate("img/logo.png", "logo")
+        with self.assertNumQueries(0):
+            context = images.picture("img/logo.png", "logo")
+        self.assertIn(".png 60w", context["srcset"])
+
+    def test_static_logo_srcset(self):
+        images.generate("img/logo.png", "logo")
+        context = images.picture("img/logo.png", "logo")
+        self.assertEqual(context["src"], "/static/img/logo.png")
+        self.assertIn(".png 60w", context["srcset"])
+        self.assertIn(".webp 30w", context["webp"])
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import rollups, search
+from ..models import AuthorStats, Follow, Group, GroupFollow, Post
+
+User = get_user_model()
+
+
+class ImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="Bazz")
+        cls.group = Group.objects.create(title="Группа", slug="test-slug")
+        cls.pub_date = timezone.make_aware(datetime(2020, 5, 17, 12, 30))
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def write(self, name, content):
+        with open(self.path(name), "w", encoding="utf-8") as stream:
+            stream.write(content)
+        return self.path(name)
+
+    def test_roundtrip(self):
+        """Выгрузка и загрузка обратно сохраняют текст, автора, группу
+        и дату публикации в обоих форматах."""
+        Post.objects.create(text="С группой", author=self.user,
+                            group=self.group)
+        Post.objects.create(text="Без группы", author=self.user)
+        Post.objects.update(pub_date=self.pub_date)
+        originals = list(Post.objects.values_list("pk", flat=True))
+        for fmt in ("jsonl", "csv"):
+            with self.subTest(fmt=fmt):
+                path = self.path(f"posts.{fmt}")
+                call_command("export_posts", path, stderr=StringIO())
+                call_command(
+                    "import_posts", path, batch_size=1, stdout=StringIO()
+                )
+                self.assertEqual(
+                    Post.objects.filter(
+                        text="С группой", group=self.group,
+                        pub_date=self.pub_date,
+                    ).count(),
+                    2,
+                )
+                self.assertEqual(
+                    Post.objects.filter(
+                        text="Без группы", group=None, author=self.user
+                    ).count(),
+                    2,
+                )
+                Post.objects.exclude(pk__in=originals).delete()
+
+    def test_export_to_stdout(self):
+        Post.objects.create(text="Пост", author=self.user)
+        out = StringIO()
+        call_command("export_posts", "-", format="jsonl", stdout=out,
+                     stderr=StringIO())
+        self.assertIn('"author": "Bazz"', out.getvalue())
+
+    def test_import_updates_counters_and_index(self):
+        """Импорт без сигналов всё равно обновляет счётчики и индекс."""
+        path = self.write(
+            "posts.jsonl",
+            '{"text": "Импортированные коты", "author": "Bazz", '
+            '"group": "test-slug"}\n'
+            '{"text": "Ещё пост", "author": "Bazz"}\n',
+        )
+        out = StringIO()
+        call_command("import_posts", path, stdout=out)
+        self.assertIn("Импортировано постов: 2", out.getvalue())
+        self.assertEqual(AuthorStats.post_count_for(self.user.pk), 2)
+        group = Group.objects.get(pk=self.group.pk)
+        self.assertEqual(group.post_count, 1)
+        self.assertEqual(
+            group.last_post_at,
+            Post.objects.get(text="Импортированные коты").pub_date,
+        )
+        self.assertEqual(len(search.search_ids("кот", 10)), 1)
+        activity = rollups.activity(self.user.pk)
+        self.assertEqual(sum(row["count"] for row in activity["months"]), 2)
+        self.assertEqual(activity["groups"][0]["slug"], "test-slug")
+
+    def test_import_fans_out_to_followers(self):
+        """Импортированные посты попадают в ленты подписчиков автора
+        и группы."""
+        author_fan = User.objects.create(username="author-fan")
+        group_fan = User.objects.create(username="group-fan")
+        Follow.objects.create(user=author_fan, author=self.user)
+        GroupFollow.objects.create(user=group_fan, group=self.group)
+        path = self.write(
+            "posts.jsonl",
+            '{"text": "В группе", "author": "Bazz", "group": "test-slug"}\n'
+            '{"text": "Без группы", "author": "Bazz"}\n',
+        )
+        call_command("import_posts", path, stdout=StringIO())
+        for user, texts in (
+            (author_fan, {"В группе", "Без группы"}),
+            (group_fan, {"В группе"}),
+        ):
+            with self.subTest(user=user.username):
+                self.client.force_login(user)
+                response = self.client.get(reverse("posts:follow_index"))
+                self.assertEqual(
+                    {post.text for post in response.context["page_obj"]},
+                    texts,
+                )
+
+    def test_unknown_author(self):
+        path = self.write(
+            "posts.csv",
+            "text,author,group,pub_date\n"
+            "Пост,Bazz,,\n"
+            "Чужой,nobody,,\n",
+        )
+        with self.assertRaises(CommandError):
+            call_command("import_posts", path, stdout=StringIO())
+        call_command(
+            "import_posts", path, skip_unknown=True, stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.filter(text="Чужой").count(), 0)
+        self.assertEqual(
+            AuthorStats.post_count_for(self.user.pk),
+            Post.objects.filter(author=self.user).count(),
+        )
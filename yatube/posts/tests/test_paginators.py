@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..models import Post
+from .. import feed_cache
+from ..paginators import CursorPaginator, encode_cursor, normalize_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    PER_PAGE = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="Bazz")
+        Post.objects.bulk_create(
+            Post(text=f"Пост №{i}", author=cls.user) for i in range(25)
+        )
+        cls.ordered = list(Post.objects.order_by("-pub_date", "-id"))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.all(), self.PER_PAGE)
+
+    def test_walk_forward_and_back(self):
+        """Курсоры обходят ленту вперёд и назад без пропусков."""
+        first = self.paginator.get_page()
+        self.assertEqual(list(first), self.ordered[:10])
+        self.assertFalse(first.has_previous())
+        second = self.paginator.get_page(first.next_cursor)
+        self.assertEqual(list(second), self.ordered[10:20])
+        third = self.paginator.get_page(second.next_cursor)
+        self.assertEqual(list(third), self.ordered[20:])
+        self.assertFalse(third.has_next())
+        back = self.paginator.get_page(third.previous_cursor)
+        self.assertEqual(list(back), self.ordered[10:20])
+        self.assertTrue(back.has_previous())
+
+    def test_last_page(self):
+        """Курсор последней страницы отдаёт самые старые посты."""
+        last = self.paginator.get_page(encode_cursor("p"))
+        self.assertEqual(list(last), self.ordered[15:])
+        self.assertFalse(last.has_next())
+        self.assertTrue(last.has_previous())
+
+    def test_page_query_cost_does_not_grow(self):
+        """Страница из глубины ленты стоит одного запроса."""
+        page = self.paginator.get_page()
+        with self.assertNumQueries(1):
+            self.paginator.get_page(page.next_cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Повреждённый курсор возвращает первую страницу."""
+        page = self.paginator.get_page("не-курсор")
+        self.assertEqual(list(page), self.ordered[:10])
+
+    def test_page_numbers_not_supported(self):
+        """Методы номеров страниц падают с понятной ошибкой."""
+        page = self.paginator.get_page()
+        for method in (
+            page.next_page_number,
+            page.previous_page_number,
+            page.start_index,
+            page.end_index,
+        ):
+            with self.assertRaisesMessage(TypeError, "next_cursor"):
+                method()
+
+    def test_cursor_normalized_for_cache_key(self):
+        """В ключ кэша попадает только канонический курсор."""
+        cursor = self.paginator.get_page().next_cursor
+        self.assertEqual(normalize_cursor(cursor + "=="), cursor)
+        for token in ("", "не-курсор", "x" * 10_000, encode_cursor("n")):
+            self.assertIsNone(normalize_cursor(token))
+        self.assertEqual(
+            feed_cache.feed_cache("index", "x" * 10_000)["key"],
+            feed_cache.feed_cache("index", None)["key"],
+        )
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_CACHE_TIMEOUT=0)
+class PostQueryPlanTests(TestCase):
+    """Запросы лент к Post должны идти по индексам.
+
+    Запросы снимаются с настоящих view и прогоняются через
+    EXPLAIN QUERY PLAN в SQLite: полный проход таблицы или сортировка
+    во временном B-дереве считаются регрессией.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="Bazz")
+        cls.group = Group.objects.create(title="Группа", slug="test-slug")
+        Post.objects.bulk_create(
+            Post(text=f"Пост №{i}", author=cls.user, group=cls.group)
+            for i in range(25)
+        )
+        cls.post = Post.objects.latest("pub_date")
+
+    def setUp(self):
+        self.client = Client()
+
+    def post_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            page_obj = response.context.get("page_obj")
+            if page_obj and page_obj.next_cursor:
+                self.client.get(url, {"cursor": page_obj.next_cursor})
+        return [
+            query["sql"]
+            for query in ctx.captured_queries
+            if 'FROM "posts_post"' in query["sql"]
+        ]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_uses_indexes(self, url):
+        queries = self.post_queries(url)
+        self.assertTrue(queries)
+        for sql in queries:
+            for step in self.explain(sql):
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertNotIn("TEMP B-TREE", step)
+                    if step.startswith("SCAN posts_post"):
+                        self.assertIn(" USING ", step)
+
+    def test_index_uses_indexes(self):
+        self.assert_uses_indexes(reverse("posts:index"))
+
+    def test_group_posts_uses_indexes(self):
+        self.assert_uses_indexes(
+            reverse("posts:group_list", kwargs={"slug": "test-slug"})
+        )
+
+    def test_profile_uses_indexes(self):
+        self.assert_uses_indexes(
+            reverse("posts:profile", kwargs={"username": "Bazz"})
+        )
+
+    def test_post_detail_uses_indexes(self):
+        self.assert_uses_indexes(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
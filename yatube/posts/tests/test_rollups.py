@@ -0,0 +1,121 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.query_budget import QueryBudgetMixin
+
+from .. import rollups
+from ..models import AuthorDay, Group, Post
+
+User = get_user_model()
+
+
+class RollupTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="Bazz")
+        cls.other = User.objects.create(username="Woody")
+        cls.group = Group.objects.create(title="Первая", slug="first")
+        cls.other_group = Group.objects.create(title="Вторая", slug="second")
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, when, group=None, author=None):
+        post = Post.objects.create(
+            text="Пост", author=author or self.author, group=group
+        )
+        pub_date = timezone.make_aware(when)
+        Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+        post.pub_date = pub_date
+        return post
+
+    def buckets(self, author=None):
+        return {
+            (row.day, row.group_id): row.post_count
+            for row in AuthorDay.objects.filter(
+                author=author or self.author, post_count__gt=0
+            )
+        }
+
+    def test_signals_keep_buckets(self):
+        """Создание, перенос и удаление поста обновляют дни автора."""
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group
+        )
+        Post.objects.create(text="Ещё", author=self.author, group=self.group)
+        today = timezone.localdate(post.pub_date)
+        self.assertEqual(self.buckets(), {(today, self.group.pk): 2})
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(
+            self.buckets(),
+            {(today, self.group.pk): 1, (today, self.other_group.pk): 1},
+        )
+        post.author = self.other
+        post.save()
+        self.assertEqual(self.buckets(), {(today, self.group.pk): 1})
+        self.assertEqual(
+            self.buckets(self.other), {(today, self.other_group.pk): 1}
+        )
+        post.delete()
+        self.assertEqual(self.buckets(self.other), {})
+
+    def test_activity(self):
+        posts = [
+            self.post(datetime(2026, 1, 5), self.group),
+            self.post(datetime(2026, 1, 20), self.other_group),
+            self.post(datetime(2026, 3, 1), self.group),
+            self.post(datetime(2026, 3, 2)),
+        ]
+        rollups.rebuild([self.author.pk])
+        with self.assertNumQueries(1):
+            stats = rollups.activity(self.author.pk)
+        self.assertEqual(
+            stats["months"],
+            [
+                {"month": date(2026, 3, 1), "count": 2},
+                {"month": date(2026, 1, 1), "count": 2},
+            ],
+        )
+        self.assertEqual(
+            [(group["slug"], group["count"]) for group in stats["groups"]],
+            [("first", 2), ("second", 1)],
+        )
+        self.assertEqual(stats["first"], posts[0].pub_date.date())
+        self.assertEqual(stats["last"], posts[-1].pub_date.date())
+
+    def test_profile_shows_activity_within_budget(self):
+        for i in range(30):
+            self.post(datetime(2026, 1, 1) + timedelta(days=i), self.group)
+        rollups.rebuild([self.author.pk])
+        url = reverse("posts:profile", args=["Bazz"])
+        response = self.assertWithinQueryBudget(url)
+        groups = response.context["activity"]["groups"]
+        self.assertEqual(groups[0]["count"], 30)
+        self.assertContains(response, "Активные группы")
+        # Повторный показ берёт статистику из кэша фрагмента.
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        for query in ctx.captured_queries:
+            self.assertNotIn(AuthorDay._meta.db_table, query["sql"])
+
+    def test_rebuild_command_after_bulk_create(self):
+        Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=self.author, group=self.group)
+            for i in range(3)
+        )
+        self.assertEqual(self.buckets(), {})
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+        self.assertIn("Пересчитано авторов: 1, постов: 3", out.getvalue())
+        today = timezone.localdate()
+        self.assertEqual(self.buckets(), {(today, self.group.pk): 3})
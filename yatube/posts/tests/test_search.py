@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Разные формы слова сводятся к одной основе."""
+        groups = [
+            ("кот", "коты", "котами", "кота"),
+            ("писать", "писали", "писала"),
+            ("красивый", "красивая", "красивые"),
+            ("ёлка", "елки", "ёлками"),
+        ]
+        for words in groups:
+            with self.subTest(words=words):
+                self.assertEqual(len(set(search.stems(" ".join(words)))), 1)
+
+    def test_latin_words_are_lowercased(self):
+        self.assertEqual(search.stems("Django ORM"), ["django", "orm"])
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="Bazz")
+        cls.cats = Post.objects.create(
+            text="Коты и кошки любят гулять", author=cls.user
+        )
+        cls.dogs = Post.objects.create(
+            text="Собаки гуляли с котом", author=cls.user
+        )
+        cls.many_cats = Post.objects.create(
+            text="Котами котов коту: про котов", author=cls.user
+        )
+
+    def test_search_matches_word_forms(self):
+        self.assertEqual(
+            set(search.search_ids("кот", 10)),
+            {self.cats.pk, self.dogs.pk, self.many_cats.pk},
+        )
+        self.assertEqual(
+            search.search_ids("гулять собака", 10), [self.dogs.pk]
+        )
+
+    def test_search_ranks_best_match_first(self):
+        self.assertEqual(search.search_ids("коты", 10)[0], self.many_cats.pk)
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется сигналами при правке и удалении поста."""
+        post = Post.objects.get(pk=self.dogs.pk)
+        post.text = "Попугаи"
+        post.save()
+        self.assertEqual(search.search_ids("попугай", 10), [post.pk])
+        self.assertNotIn(post.pk, search.search_ids("собаки", 10))
+        post.delete()
+        self.assertEqual(search.search_ids("попугай", 10), [])
+
+    def test_rebuild_command(self):
+        Post.objects.bulk_create([Post(text="Хомяки", author=self.user)])
+        self.assertEqual(search.search_ids("хомяк", 10), [])
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Проиндексировано постов: 4", out.getvalue())
+        self.assertEqual(len(search.search_ids("хомяк", 10)), 1)
+
+    def test_search_view(self):
+        response = Client().get(reverse("posts:post_search"), {"q": "кошка"})
+        self.assertTemplateUsed(response, "posts/search.html")
+        self.assertEqual(list(response.context["page_obj"]), [self.cats])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse("admin:posts_post_changelist"), {"q": "собака"}
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.dogs]
+        )
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import submissions
+from ..models import AuthorStats, PendingPost, Post
+
+User = get_user_model()
+
+
+class PostSubmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="Bazz")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def submit(self, text="Пост", key=None):
+        data = {"text": text}
+        if key is not None:
+            data["idempotency_key"] = key
+        return self.client.post(reverse("posts:post_create"), data)
+
+    def test_form_carries_key(self):
+        response = self.client.get(reverse("posts:post_create"))
+        self.assertContains(response, 'name="idempotency_key"')
+        self.assertEqual(len(response.context["form"].fields), 2)
+
+    def test_resubmit_with_same_key_creates_one_post(self):
+        for _ in range(3):
+            response = self.submit(key="double-click")
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(Post.objects.count(), 1)
+        self.submit(key="another")
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(POST_RATE_LIMIT=1, POST_RATE_LIMIT_BURST=2)
+    def test_rate_limit(self):
+        self.submit(key="1")
+        self.submit(key="2")
+        response = self.submit(text="Лишний", key="3")
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        # Текст не теряется, а ключ можно отправить снова.
+        self.assertContains(
+            response, "Лишний", status_code=HTTPStatus.TOO_MANY_REQUESTS
+        )
+        self.assertEqual(Post.objects.count(), 2)
+        cache.clear()
+        self.submit(key="3")
+        self.assertEqual(Post.objects.count(), 3)
+
+    @override_settings(POST_WRITE_BEHIND=True)
+    def test_write_behind(self):
+        for i in range(3):
+            self.submit(text=f"Пост {i}", key=str(i))
+        self.assertEqual(Post.objects.count(), 0)
+        self.assertEqual(PendingPost.objects.count(), 3)
+        out = StringIO()
+        call_command("drain_posts", batch_size=2, stdout=out)
+        self.assertIn("Записано постов: 3", out.getvalue())
+        self.assertFalse(PendingPost.objects.exists())
+        self.assertEqual(
+            list(Post.objects.order_by("id").values_list("text", flat=True)),
+            ["Пост 0", "Пост 1", "Пост 2"],
+        )
+        # Сигналы отработали и при пакетной записи.
+        self.assertEqual(AuthorStats.post_count_for(self.user.pk), 3)
+
+    @override_settings(POST_WRITE_BEHIND=True)
+    def test_drain_keeps_submission_time(self):
+        self.submit(key="1")
+        sent = timezone.now() - timedelta(hours=1)
+        PendingPost.objects.update(created=sent)
+        submissions.drain()
+        post = Post.objects.get()
+        self.assertEqual(post.pub_date, sent)
+        self.assertEqual(post.updated, sent)
+        # Даты снова проставляются автоматически.
+        self.submit(key="2")
+        submissions.drain()
+        self.assertGreater(Post.objects.latest("id").pub_date, sent)
+
+    @override_settings(POST_RATE_LIMIT=1, POST_RATE_LIMIT_BURST=2)
+    def test_parallel_requests_share_bucket(self):
+        waits = []
+        barrier = threading.Barrier(8)
+        # Кэш свой в каждом потоке, поэтому подменяем метод класса.
+        backend = type(caches["default"])
+        get = backend.get
+
+        def slow_get(self, *args, **kwargs):
+            # Расширяем окно между чтением и записью ведра.
+            value = get(self, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        def take():
+            barrier.wait()
+            waits.append(submissions.take_token(self.user.pk))
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        with mock.patch.object(backend, "get", slow_get):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(waits.count(0), 2)
+
+    @override_settings(POST_RATE_LIMIT=1, POST_RATE_LIMIT_BURST=2)
+    def test_busy_bucket_is_rate_limited(self):
+        cache.add(f"post-bucket:{self.user.pk}:lock", 1)
+        with mock.patch.object(submissions, "LOCK_WAIT", 0):
+            self.assertGreater(submissions.take_token(self.user.pk), 0)
+            response = self.submit(key="1")
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertFalse(Post.objects.exists())
+
+    def test_failed_write_releases_key(self):
+        with mock.patch.object(
+            submissions, "submit", side_effect=OperationalError("locked")
+        ):
+            with self.assertRaises(OperationalError):
+                self.submit(key="retry")
+        self.submit(key="retry")
+        self.assertEqual(Post.objects.count(), 1)
@@ -0,0 +1,146 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetMixin
+
+from .. import timeline
+from ..models import AuthorStats, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="reader")
+        cls.author = User.objects.create(username="Bazz")
+        cls.other = User.objects.create(username="Woody")
+        cls.group = Group.objects.create(title="Группа", slug="test-slug")
+        cls.old_post = Post.objects.create(
+            text="Старый пост", author=cls.author
+        )
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def follow(self, username):
+        self.client.post(
+            reverse("posts:profile_follow", kwargs={"username": username})
+        )
+
+    def timeline_ids(self, user=None):
+        return list(
+            TimelineEntry.objects.filter(user=user or self.reader)
+            .order_by("-pub_date", "-post_id")
+            .values_list("post_id", flat=True)
+        )
+
+    def feed(self):
+        response = self.assertWithinQueryBudget(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [post.pk for post in response.context["page_obj"]]
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        """Подписка подтягивает старые посты, новые раздаются сразу."""
+        self.follow("Bazz")
+        self.assertEqual(self.timeline_ids(), [self.old_post.pk])
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        Post.objects.create(text="Чужой пост", author=self.other)
+        self.assertEqual(self.timeline_ids(), [post.pk, self.old_post.pk])
+        self.assertEqual(self.feed(), [post.pk, self.old_post.pk])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).follower_count, 1
+        )
+
+    def test_unfollow_keeps_posts_of_followed_group(self):
+        self.follow("Bazz")
+        in_group = Post.objects.create(
+            text="Пост в группе", author=self.author, group=self.group
+        )
+        self.client.post(
+            reverse("posts:group_follow", kwargs={"slug": "test-slug"})
+        )
+        self.client.post(
+            reverse("posts:profile_unfollow", kwargs={"username": "Bazz"})
+        )
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.timeline_ids(), [in_group.pk])
+
+    def test_group_change_moves_post_between_timelines(self):
+        """Пост, перенесённый в другую группу, уходит из лент подписчиков
+        прежней группы и появляется у подписчиков новой."""
+        other_group = Group.objects.create(title="Другая", slug="other")
+        post = Post.objects.create(
+            text="Пост в группе", author=self.other, group=self.group
+        )
+        self.client.post(
+            reverse("posts:group_follow", kwargs={"slug": "test-slug"})
+        )
+        newcomer = User.objects.create(username="newcomer")
+        newcomer_client = Client()
+        newcomer_client.force_login(newcomer)
+        newcomer_client.post(
+            reverse("posts:group_follow", kwargs={"slug": "other"})
+        )
+        self.assertEqual(self.timeline_ids(), [post.pk])
+        self.assertEqual(self.timeline_ids(newcomer), [])
+        post.group = other_group
+        post.save()
+        self.assertEqual(self.timeline_ids(), [])
+        self.assertEqual(self.timeline_ids(newcomer), [post.pk])
+        # Подписка на автора держит пост в ленте при любой группе.
+        self.client.post(
+            reverse("posts:profile_follow", kwargs={"username": "Woody"})
+        )
+        post.group = self.group
+        post.save()
+        self.assertEqual(self.timeline_ids(), [post.pk])
+        self.assertEqual(self.timeline_ids(newcomer), [])
+
+    def test_cannot_follow_self(self):
+        self.follow("reader")
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(TIMELINE_SIZE=2)
+    def test_timeline_capped(self):
+        self.follow("Bazz")
+        posts = [
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+            for i in range(3)
+        ]
+        timeline.trim([self.reader.pk])
+        self.assertEqual(self.timeline_ids(), [posts[2].pk, posts[1].pk])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_read_live(self):
+        """Посты автора с множеством подписчиков читаются при показе."""
+        self.follow("Bazz")
+        TimelineEntry.objects.all().delete()
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertEqual(self.timeline_ids(), [])
+        self.assertEqual(self.feed(), [post.pk, self.old_post.pk])
+
+    def test_feed_cursor_paging(self):
+        self.follow("Bazz")
+        for i in range(12):
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+        url = reverse("posts:follow_index")
+        first = self.client.get(url).context["page_obj"]
+        second = self.client.get(
+            url, {"cursor": first.next_cursor}
+        ).context["page_obj"]
+        self.assertEqual(len(first) + len(second), 13)
+        self.assertFalse(second.has_next())
+
+    def test_rebuild_command(self):
+        self.follow("Bazz")
+        TimelineEntry.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_timelines", stdout=out)
+        self.assertEqual(self.timeline_ids(), [self.old_post.pk])
+        self.assertIn("Пересобрано лент: 1", out.getvalue())
@@ -3,12 +3,20 @@ from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.query_budget import QueryBudgetMixin
+
+from .. import feed_cache, groups
 from ..models import Post, Group
 
 User = get_user_model()
 
 
-class PostPagesTests(TestCase):
+class PostPagesTests(QueryBudgetMixin, TestCase):
+    def clear_caches(self):
+        super().clear_caches()
+        # Кэш групп по слагу живёт в памяти процесса.
+        groups.forget()
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -26,6 +34,8 @@ class PostPagesTests(TestCase):
             for i in range(15)
         ]
         Post.objects.bulk_create(post_objs)
+        # bulk_create не шлёт сигналов, сбрасываем кэш лент вручную
+        feed_cache.invalidate_all()
         cls.last_post_id = Post.objects.latest("pub_date").id
         cls.templates_pages_names = {
             reverse("posts:index"): "posts/index.html",
@@ -73,18 +83,17 @@ class PostPagesTests(TestCase):
             self.user,
             self.group,
         ]
-        view_funcs = {
-            reverse("posts:index"): "?page=2",
-            reverse(
-                "posts:group_list", kwargs={"slug": "test-slug"}
-            ): "?page=2",
-            reverse("posts:profile", kwargs={"username": "Bazz"}): "?page=2",
-        }
-        for reverse_name, page_number in view_funcs.items():
+        view_funcs = [
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "test-slug"}),
+            reverse("posts:profile", kwargs={"username": "Bazz"}),
+        ]
+        for reverse_name in view_funcs:
             with self.subTest(reverse_name=reverse_name):
                 response = self.client.get(reverse_name)
                 self.assertEqual(len(response.context["page_obj"]), 10)
-                response = self.client.get(reverse_name + page_number)
+                cursor = response.context["page_obj"].next_cursor
+                response = self.client.get(reverse_name, {"cursor": cursor})
                 self.assertEqual(len(response.context["page_obj"]), 5)
                 response = self.authorized_client.get(reverse_name)
                 first_object = response.context["page_obj"][0]
@@ -144,3 +153,26 @@ class PostPagesTests(TestCase):
                 self.assertEqual(first_object.text, FIELDS[0])
                 self.assertEqual(first_object.author, FIELDS[1])
                 self.assertEqual(first_object.group, FIELDS[2])
+
+    def test_pages_within_query_budget(self):
+        """Ленты и страница поста укладываются в бюджет запросов,
+        сколько бы постов ни было на странице"""
+        urls = [
+            (reverse("posts:index"), None),
+            (reverse("posts:group_list", kwargs={"slug": "test-slug"}), None),
+            (reverse("posts:profile", kwargs={"username": "Bazz"}), None),
+            (
+                reverse(
+                    "posts:post_detail",
+                    kwargs={"post_id": PostPagesTests.last_post_id},
+                ),
+                None,
+            ),
+            (reverse("posts:post_search"), {"q": "Пост"}),
+        ]
+        for url, data in urls:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url, data=data)
+                self.assertWithinQueryBudget(
+                    url, client=self.authorized_client, data=data
+                )
@@ -0,0 +1,227 @@
+"""Лента подписок с раздачей постов при записи (fan-out on write).
+
+Новый пост сразу записывается в TimelineEntry каждого подписчика его
+автора и группы, поэтому чтение ленты — диапазон по индексу
+(user, pub_date, post) без JOIN и сортировки всех постов. Лента хранит
+около TIMELINE_SIZE последних записей. Посты авторов и групп, у которых
+больше TIMELINE_FANOUT_LIMIT подписчиков, не раздаются, а читаются
+напрямую при показе ленты (гибридный режим).
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import (AuthorStats, Follow, Group, GroupFollow, Post,
+                     TimelineEntry)
+from .paginators import FORWARD, CursorPaginator, decode_cursor
+
+# Обрезка ленты стоит чтения TIMELINE_SIZE строк, поэтому подписчиков
+# обрезаем не на каждом посте, а на каждом TRIM_EVERY-м.
+TRIM_EVERY = 50
+BATCH_SIZE = 500
+
+
+def _add(user_id, rows):
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in rows
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _latest(posts):
+    return posts.order_by("-pub_date", "-id").values_list("id", "pub_date")[
+        : settings.TIMELINE_SIZE
+    ]
+
+
+def trim(user_ids):
+    """Оставляет каждому из пользователей TIMELINE_SIZE свежих записей."""
+    table = TimelineEntry._meta.db_table
+    user_ids = list(user_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start:start + BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id IN ("
+                "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                "PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC"
+                f") AS position FROM {table} "
+                f"WHERE user_id IN ({placeholders})) ranked "
+                "WHERE position > %s)",
+                [*batch, settings.TIMELINE_SIZE],
+            )
+
+
+def _fans_out(stats_model, **lookup):
+    count = (
+        stats_model.objects.filter(**lookup)
+        .values_list("follower_count", flat=True)
+        .first()
+    )
+    return (count or 0) <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out(post):
+    """Раздаёт новый пост в ленты подписчиков автора и группы."""
+    recipients = set()
+    if _fans_out(AuthorStats, author_id=post.author_id):
+        recipients.update(
+            Follow.objects.filter(author_id=post.author_id).values_list(
+                "user_id", flat=True
+            )
+        )
+    if post.group_id is not None and _fans_out(Group, pk=post.group_id):
+        recipients.update(
+            GroupFollow.objects.filter(group_id=post.group_id).values_list(
+                "user_id", flat=True
+            )
+        )
+    recipients.discard(post.author_id)
+    if not recipients:
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in recipients
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    if post.pk % TRIM_EVERY == 0:
+        trim(recipients)
+
+
+def post_moved(post):
+    """Пост сменил группу или автора: уходит из лент, куда попал только
+    через прежние подписки, и раздаётся новым подписчикам."""
+    TimelineEntry.objects.filter(post_id=post.pk).filter(
+        Q(user_id=post.author_id)
+        | ~Q(
+            user_id__in=Follow.objects.filter(
+                author_id=post.author_id
+            ).values("user_id")
+        )
+        & ~Q(
+            user_id__in=GroupFollow.objects.filter(
+                group_id=post.group_id
+            ).values("user_id")
+        )
+    ).delete()
+    fan_out(post)
+
+
+def author_followed(user_id, author_id):
+    _add(user_id, _latest(Post.objects.filter(author_id=author_id)))
+    trim([user_id])
+
+
+def group_followed(user_id, group_id):
+    posts = Post.objects.filter(group_id=group_id).exclude(author_id=user_id)
+    _add(user_id, _latest(posts))
+    trim([user_id])
+
+
+def author_unfollowed(user_id, author_id):
+    # Посты остаются в ленте, если пользователь подписан на их группу.
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).exclude(
+        post__group_id__in=GroupFollow.objects.filter(
+            user_id=user_id
+        ).values("group_id")
+    ).delete()
+
+
+def group_unfollowed(user_id, group_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__group_id=group_id
+    ).exclude(
+        post__author_id__in=Follow.objects.filter(user_id=user_id).values(
+            "author_id"
+        )
+    ).delete()
+
+
+def followers(author_ids=(), group_ids=()):
+    """Подписчики любого из авторов или любой из групп."""
+    user_ids = set(
+        Follow.objects.filter(author_id__in=list(author_ids)).values_list(
+            "user_id", flat=True
+        )
+    )
+    user_ids.update(
+        GroupFollow.objects.filter(group_id__in=list(group_ids)).values_list(
+            "user_id", flat=True
+        )
+    )
+    return user_ids
+
+
+def rebuild(user_id):
+    """Собирает ленту пользователя заново из его подписок."""
+    posts = Post.objects.filter(
+        Q(author_id__in=Follow.objects.filter(user_id=user_id).values(
+            "author_id"
+        ))
+        | Q(group_id__in=GroupFollow.objects.filter(user_id=user_id).values(
+            "group_id"
+        ))
+    ).exclude(author_id=user_id)
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        _add(user_id, _latest(posts))
+
+
+def sources(user):
+    """Источники ленты: записи TimelineEntry и живые выборки постов
+    популярных авторов и групп, которым раздача не делается."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    result = [(TimelineEntry.objects.filter(user=user), "post_id")]
+    authors = list(
+        Follow.objects.filter(
+            user=user, author__post_stats__follower_count__gt=limit
+        ).values_list("author_id", flat=True)
+    )
+    if authors:
+        result.append((Post.objects.filter(author_id__in=authors), "id"))
+    groups = list(
+        GroupFollow.objects.filter(
+            user=user, group__follower_count__gt=limit
+        ).values_list("group_id", flat=True)
+    )
+    if groups:
+        posts = Post.objects.filter(group_id__in=groups).exclude(author=user)
+        result.append((posts, "id"))
+    return result
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная страница, слитая из нескольких источников.
+
+    object_list — список пар (queryset, поле id поста). Из каждого
+    источника берётся окно за курсором, ключи сливаются, а посты
+    страницы загружаются одним in_bulk.
+    """
+
+    def page(self, cursor=None):
+        direction, key = FORWARD, None
+        if cursor:
+            direction, key = decode_cursor(cursor)
+        keys = set()
+        for queryset, id_field in self.object_list:
+            keys.update(self.window(
+                queryset.values_list("pub_date", id_field),
+                direction,
+                key,
+                id_field,
+            ))
+        keys = sorted(keys, reverse=direction == FORWARD)
+        keys = keys[: self.per_page + 1]
+        posts = Post.objects.feed().in_bulk([pk for _, pk in keys])
+        rows = [posts[pk] for _, pk in keys if pk in posts]
+        return self.make_page(rows, direction, key)
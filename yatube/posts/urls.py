@@ -6,6 +6,7 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("group/", views.group_index, name="group_index"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     # Профайл пользователя
     path("profile/<str:username>/", views.profile, name="profile"),
@@ -13,4 +14,23 @@ urlpatterns = [
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="post_edit"),
     path("create/", views.post_create, name="post_create"),
+    path("search/", views.post_search, name="post_search"),
+    # Подписки
+    path("follow/", views.follow_index, name="follow_index"),
+    path(
+        "profile/<str:username>/follow/",
+        views.profile_follow,
+        name="profile_follow",
+    ),
+    path(
+        "profile/<str:username>/unfollow/",
+        views.profile_unfollow,
+        name="profile_unfollow",
+    ),
+    path("group/<slug:slug>/follow/", views.group_follow, name="group_follow"),
+    path(
+        "group/<slug:slug>/unfollow/",
+        views.group_unfollow,
+        name="group_unfollow",
+    ),
 ]
@@ -1,62 +1,123 @@
+import math
+from http import HTTPStatus
+
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition, require_POST
+
+from core.query_budget import query_budget
 
-from .forms import PostForm
-from .models import Group, Post, User
+from . import (archive, conditional, feed_cache, groups, rollups, search,
+               submissions, timeline)
+from .forms import PostForm, PostImageForm
+from .models import AuthorStats, Follow, GroupFollow, Post, User
+from .paginators import CursorPaginator
 
 PER_PAGE = 10
+# Поиск отдаёт не больше стольких лучших результатов.
+SEARCH_LIMIT = 500
 
 
-def paginate(request, post_list):
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+def paginate(request, post_list, paginator_class=CursorPaginator):
+    paginator = paginator_class(post_list, PER_PAGE)
+    cursor = request.GET.get("cursor")
+    page_obj = paginator.get_page(cursor)
     return page_obj
 
 
+def cached_feed(request, view_name, post_list, *scopes,
+                paginator_class=CursorPaginator):
+    """Страница ленты, которая запрашивается из БД только при промахе
+    кэша фрагмента в шаблоне."""
+    page_obj = SimpleLazyObject(
+        lambda: paginate(request, post_list, paginator_class)
+    )
+    cache = feed_cache.feed_cache(
+        view_name, request.GET.get("cursor"), *scopes
+    )
+    return {"page_obj": page_obj, "feed_cache": cache}
+
+
+@query_budget(4)
+@condition(etag_func=conditional.index_etag)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginate(request, post_list)
+    post_list = Post.objects.feed()
     # Отдаем в словаре контекста
-    context = {
-        "page_obj": page_obj,
-    }
+    context = cached_feed(request, "index", post_list, feed_cache.INDEX)
     return render(request, "posts/index.html", context)
 
 
-def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginate(request, post_list)
+@query_budget(5)
+def group_index(request):
+    paginator = Paginator(groups.directory(), PER_PAGE * 5)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    return render(request, "posts/group_index.html", {"page_obj": page_obj})
 
-    context = {
-        "group": group,
-        "page_obj": page_obj,
-    }
+
+@query_budget(7)
+@condition(etag_func=conditional.group_etag)
+def group_posts(request, slug):
+    group = groups.get_or_404(slug)
+    post_list = group.posts.feed()
+    context = cached_feed(
+        request, "group_list", post_list, feed_cache.group_scope(group.pk)
+    )
+    context["group"] = group
+    context["following"] = (
+        request.user.is_authenticated
+        and GroupFollow.objects.filter(user=request.user, group=group).exists()
+    )
     return render(request, "posts/group_list.html", context)
 
 
+@query_budget(9)
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
     # Здесь код запроса к модели и создание словаря контекста
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.filter(author__username=username)
-
-    page_obj = paginate(request, posts)
-
-    count = posts.count()
-    context = {
-        "count": count,
-        "page_obj": page_obj,
-        "author": author,
-    }
+    # Автора уже нашёл ETag профиля.
+    author = conditional.profile_author(request, username)
+    if author is None:
+        raise Http404("Автор не найден")
+    # Профиль листает и архивные посты автора.
+    posts = [author.posts.feed(), author.archived_posts.feed()]
+    context = cached_feed(
+        request,
+        "profile",
+        posts,
+        feed_cache.author_scope(author.pk),
+        paginator_class=archive.ArchivePaginator,
+    )
+    context["count"] = AuthorStats.post_count_for(author.pk)
+    # Статистика читается из свёрток только при промахе кэша фрагмента.
+    context["activity"] = SimpleLazyObject(
+        lambda: rollups.activity(author.pk)
+    )
+    context["activity_cache"] = feed_cache.feed_cache(
+        "profile_activity", None, feed_cache.author_scope(author.pk)
+    )
+    context["author"] = author
+    context["following"] = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
     return render(request, "posts/profile.html", context)
 
 
+@query_budget(6)
+@condition(
+    etag_func=conditional.post_detail_etag,
+    last_modified_func=conditional.post_detail_last_modified,
+)
 def post_detail(request, post_id):
     # Здесь код запроса к модели и создание словаря контекста
-    post_alone = get_object_or_404(Post, pk=post_id)
-    count = Post.objects.filter(author=post_alone.author).count()
+    # Валидаторы условного GET уже выяснили, в архиве ли пост.
+    post_alone = archive.get_post_or_404(
+        post_id, conditional.post_model(request, post_id)
+    )
+    count = AuthorStats.post_count_for(post_alone.author_id)
     context = {
         "post_alone": post_alone,
         "count": count,
@@ -64,28 +125,122 @@ def post_detail(request, post_id):
     return render(request, "posts/post_detail.html", context)
 
 
+@query_budget(4)
+def post_search(request):
+    query = request.GET.get("q", "").strip()
+    post_ids = search.search_ids(query, SEARCH_LIMIT) if query else []
+    # Список id уже в памяти, поэтому Paginator не делает COUNT.
+    page_obj = Paginator(post_ids, PER_PAGE).get_page(request.GET.get("page"))
+    posts = Post.objects.feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        "query": query,
+        "page_obj": page_obj,
+    }
+    return render(request, "posts/search.html", context)
+
+
+@query_budget(8)
+@login_required
+def follow_index(request):
+    """Лента подписок из материализованной ленты пользователя."""
+    paginator = timeline.TimelinePaginator(
+        timeline.sources(request.user), PER_PAGE
+    )
+    page_obj = paginator.get_page(request.GET.get("cursor"))
+    return render(request, "posts/follow.html", {"page_obj": page_obj})
+
+
+@require_POST
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect("posts:profile", username=username)
+
+
+@require_POST
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    # Удаление через queryset тоже шлёт post_delete, лента обновится.
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect("posts:profile", username=username)
+
+
+@require_POST
+@login_required
+def group_follow(request, slug):
+    group = groups.get_or_404(slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect("posts:group_list", slug=slug)
+
+
+@require_POST
+@login_required
+def group_unfollow(request, slug):
+    group = groups.get_or_404(slug)
+    GroupFollow.objects.filter(user=request.user, group=group).delete()
+    return redirect("posts:group_list", slug=slug)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
-    if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
-        return redirect("posts:profile", username=post.author)
+    # Обе формы заполняют один и тот же объект.
+    post = Post(author=request.user)
+    form = PostForm(request.POST or None, instance=post)
+    image_form = PostImageForm(
+        request.POST or None, request.FILES or None, instance=post
+    )
+    key = request.POST.get(submissions.IDEMPOTENCY_FIELD)
+    wait = 0
+    if form.is_valid() and image_form.is_valid():
+        if not submissions.claim_key(request.user.pk, key):
+            # Повтор уже принятой формы: второй пост не создаём.
+            return redirect("posts:profile", username=request.user)
+        wait = submissions.take_token(request.user.pk)
+        if not wait:
+            try:
+                submissions.submit(post)
+            except Exception:
+                # Пост не записан: повторная отправка не должна
+                # считаться дублем.
+                submissions.release_key(request.user.pk, key)
+                raise
+            return redirect("posts:profile", username=post.author)
+        submissions.release_key(request.user.pk, key)
+        form.add_error(
+            None, "Слишком много постов подряд, попробуйте чуть позже."
+        )
 
-    context = {"form": form}
-    return render(request, "posts/create_post.html", context)
+    context = {
+        "form": form,
+        "image_form": image_form,
+        "idempotency_key": key or submissions.new_key(),
+    }
+    response = render(request, "posts/create_post.html", context)
+    if wait:
+        response.status_code = HTTPStatus.TOO_MANY_REQUESTS
+        response["Retry-After"] = str(math.ceil(wait))
+    return response
 
 
 @login_required
 def post_edit(request, post_id):
+    # Архивный пост не редактируется: 404 намеренно, см. posts.archive.
     edit_post = get_object_or_404(Post, id=post_id)
     if request.user != edit_post.author:
         return redirect("posts:post_detail", post_id=post_id)
     form = PostForm(request.POST or None, instance=edit_post)
-    if form.is_valid():
-        form.save()
+    image_form = PostImageForm(
+        request.POST or None, request.FILES or None, instance=edit_post
+    )
+    if form.is_valid() and image_form.is_valid():
+        edit_post.save()
         return redirect("posts:post_detail", post_id=post_id)
     template = "posts/create_post.html"
-    context = {"form": form, "is_edit": True}
+    context = {"form": form, "image_form": image_form, "is_edit": True}
     return render(request, template, context)
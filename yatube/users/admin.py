@@ -1 +1,21 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "subject",
+        "to",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+    empty_value_display = "-пусто-"
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
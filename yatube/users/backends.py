@@ -0,0 +1,34 @@
+"""ModelBackend с кэшем пользователя.
+
+На каждый авторизованный запрос AuthenticationMiddleware загружает
+пользователя по id из сессии. CachedModelBackend хранит его в кэше
+AUTH_USER_CACHE_TIMEOUT секунд; запись сбрасывается при сохранении
+пользователя (смена пароля, last_login при входе) и при выходе, см.
+users.signals. Кэш должен быть общим для всех процессов, иначе другой
+процесс увидит смену пароля только по истечении таймаута.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, timeout)
+        return user
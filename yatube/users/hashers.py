@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 с числом итераций из PASSWORD_HASH_ITERATIONS.
+
+    Алгоритм тот же, поэтому старые хэши подходят. При входе пароль
+    перехэшируется только в сторону большего числа итераций: снижение
+    настройки не ослабляет уже сохранённые хэши.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def must_update(self, encoded):
+        iterations = int(encoded.split("$", 2)[1])
+        return iterations < self.iterations
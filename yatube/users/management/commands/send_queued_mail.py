@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import outbox
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди пачками через одно соединение"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Писем за одно соединение (MAIL_OUTBOX_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а проверять очередь каждые --interval с",
+        )
+        parser.add_argument("--interval", type=float, default=5)
+
+    def handle(self, *args, batch_size=None, loop=False, interval=5,
+               **options):
+        while True:
+            sent, failed = outbox.send_pending(batch_size)
+            if sent or failed or not loop:
+                self.stdout.write(
+                    f"Отправлено писем: {sent}, с ошибкой: {failed}"
+                )
+            if not loop:
+                return
+            time.sleep(interval)
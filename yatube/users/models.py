@@ -1 +1,56 @@
-# Create your models here.
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку, см. users.outbox."""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (SENT, "Отправлено"),
+        (FAILED, "Не доставлено"),
+    )
+
+    subject = models.CharField(max_length=998, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    from_email = models.CharField(
+        max_length=254, blank=True, verbose_name="Отправитель"
+    )
+    # Адреса получателей через запятую.
+    to = models.TextField(verbose_name="Получатели")
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попытки"
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Следующая попытка"
+    )
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+    # Метка воркера, взявшего письмо последним, см. outbox.claim.
+    lease = models.CharField(max_length=32, blank=True, editable=False)
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name="Создано"
+    )
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Отправлено"
+    )
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        indexes = [
+            # Выборка воркера: письма в очереди, чей срок уже наступил.
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.subject
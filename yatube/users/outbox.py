@@ -0,0 +1,144 @@
+"""Очередь исходящей почты.
+
+View кладут письма в таблицу OutgoingEmail и сразу отвечают, а команда
+send_queued_mail отправляет их пачками через одно соединение с почтовым
+сервером. Неудачная отправка повторяется с экспоненциальной задержкой,
+после MAIL_OUTBOX_MAX_ATTEMPTS попыток письмо помечается недоставленным.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import BadHeaderError, EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+# Сколько воркер держит за собой взятые письма, пока отправляет их.
+LEASE = timedelta(minutes=5)
+
+
+def enqueue(subject, message, from_email, recipient_list):
+    """Ставит письмо в очередь; аргументы как у send_mail."""
+    # send_mail проверил бы заголовок при отправке, но тогда ошибка
+    # досталась бы воркеру, а не пользователю.
+    if "\n" in subject or "\r" in subject:
+        raise BadHeaderError("Header values can't contain newlines")
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or "",
+        to=",".join(recipient_list),
+    )
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: база * 2^(попытки - 1)."""
+    return timedelta(
+        seconds=settings.MAIL_OUTBOX_BACKOFF * 2 ** (attempts - 1)
+    )
+
+
+def claim(batch_size):
+    """Забирает пачку писем, срок которых наступил.
+
+    Взятым письмам срок сдвигается на LEASE вперёд, поэтому параллельный
+    воркер их не возьмёт, а письма упавшего воркера вернутся в очередь.
+    SQLite не блокирует строки (select_for_update там ничего не делает),
+    поэтому письмо берётся условным UPDATE: он сработает, только если
+    срок ещё не сдвинул другой воркер, и ставит метку этого воркера.
+    Отправляются только письма с ней.
+    """
+    now = timezone.now()
+    # Кандидаты читаются без транзакции, как в posts.submissions.drain.
+    return _lease(_due(now, batch_size), now)
+
+
+def _due(now, batch_size):
+    return list(
+        OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+        )
+        .order_by("next_attempt_at", "id")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+
+
+def _lease(candidates, now):
+    if not candidates:
+        return []
+    lease = uuid.uuid4().hex
+    OutgoingEmail.objects.filter(
+        pk__in=candidates,
+        status=OutgoingEmail.PENDING,
+        next_attempt_at__lte=now,
+    ).update(next_attempt_at=now + LEASE, lease=lease)
+    return list(
+        OutgoingEmail.objects.filter(pk__in=candidates, lease=lease)
+        .order_by("id")
+    )
+
+
+def _message(email, connection):
+    return EmailMessage(
+        email.subject,
+        email.body,
+        email.from_email or None,
+        email.to.split(","),
+        connection=connection,
+    )
+
+
+def send_batch(batch_size=None):
+    """Отправляет одну пачку, возвращает (отправлено, с ошибкой)."""
+    emails = claim(batch_size or settings.MAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # Сервер недоступен: вся пачка уходит на повтор.
+        for email in emails:
+            _retry_later(email, error)
+        return 0, len(emails)
+    sent = failed = 0
+    try:
+        for email in emails:
+            try:
+                _message(email, connection).send()
+            except Exception as error:
+                failed += 1
+                _retry_later(email, error)
+            else:
+                sent += 1
+                OutgoingEmail.objects.filter(pk=email.pk).update(
+                    status=OutgoingEmail.SENT,
+                    attempts=email.attempts + 1,
+                    sent_at=timezone.now(),
+                    last_error="",
+                )
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _retry_later(email, error):
+    attempts = email.attempts + 1
+    update = {"attempts": attempts, "last_error": repr(error)}
+    if attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+        update["status"] = OutgoingEmail.FAILED
+    else:
+        update["next_attempt_at"] = timezone.now() + backoff(attempts)
+    OutgoingEmail.objects.filter(pk=email.pk).update(**update)
+
+
+def send_pending(batch_size=None):
+    """Отправляет все письма, срок которых наступил."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = send_batch(batch_size)
+        if not sent and not failed:
+            return total_sent, total_failed
+        total_sent += sent
+        total_failed += failed
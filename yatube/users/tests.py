@@ -1 +1,164 @@
-# Create your tests here.
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (check_password, get_hasher,
+                                         make_password)
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import outbox
+from .backends import user_cache_key
+from .models import OutgoingEmail
+
+User = get_user_model()
+
+
+class CountingBackend(EmailBackend):
+    """locmem-бэкенд, считающий открытые соединения."""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP недоступен")
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_view_enqueues_without_sending(self):
+        """Форма кладёт письмо в очередь и не ждёт почтового сервера."""
+        self.client.post(
+            reverse("users:password_reset_form"),
+            {"subject": "Тема", "message": "Текст", "from_email": "a@b.ru"},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, "admin@example.com")
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+
+    def test_view_rejects_bad_header(self):
+        response = self.client.post(
+            reverse("users:password_reset_form"),
+            {"subject": "Тема\nBcc: x@y.ru", "message": "Текст"},
+        )
+        self.assertContains(response, "Invalid header found.")
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    @override_settings(
+        EMAIL_BACKEND="users.tests.CountingBackend",
+        MAIL_OUTBOX_BATCH_SIZE=2,
+    )
+    def test_command_sends_batches_over_one_connection(self):
+        for i in range(3):
+            outbox.enqueue(f"Письмо {i}", "Текст", "", ["a@b.ru"])
+        out = StringIO()
+        call_command("send_queued_mail", stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingBackend.opened, 2)
+        self.assertIn("Отправлено писем: 3", out.getvalue())
+        self.assertFalse(
+            OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists()
+        )
+
+    @override_settings(
+        EMAIL_BACKEND="users.tests.FailingBackend",
+        MAIL_OUTBOX_MAX_ATTEMPTS=2,
+        MAIL_OUTBOX_BACKOFF=60,
+    )
+    def test_failed_send_retried_with_backoff(self):
+        """Ошибка откладывает письмо, после всех попыток оно failed."""
+        email = outbox.enqueue("Тема", "Текст", "", ["a@b.ru"])
+        self.assertEqual(outbox.send_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertGreater(
+            email.next_attempt_at, timezone.now() + outbox.backoff(1) / 2
+        )
+        # До наступления срока письмо не трогают.
+        self.assertEqual(outbox.send_pending(), (0, 0))
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        outbox.send_pending()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertIn("SMTP недоступен", email.last_error)
+
+    def test_parallel_workers_do_not_share_emails(self):
+        """Два воркера прочитали одни и те же письма: отправит их только
+        тот, кто первым сдвинул срок."""
+        for i in range(3):
+            outbox.enqueue(f"Письмо {i}", "Текст", "", ["a@b.ru"])
+        now = timezone.now()
+        first = outbox._due(now, 10)
+        second = outbox._due(now, 10)
+        self.assertEqual(len(outbox._lease(first, now)), 3)
+        self.assertEqual(outbox._lease(second, now), [])
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTH_USER_CACHE_TIMEOUT=60,
+)
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="Bazz", password="pw")
+        self.client.force_login(self.user)
+        self.url = reverse("about:author")
+
+    def test_session_and_user_read_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertTrue(response.context["user"].is_authenticated)
+
+    def test_password_change_invalidates_cached_user(self):
+        self.client.get(self.url)
+        self.user.set_password("new-password")
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context["user"].is_authenticated)
+
+    def test_logout_forgets_user(self):
+        self.client.get(self.url)
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.client.get(reverse("users:logout"))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+
+class PasswordHasherTests(TestCase):
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_iterations_from_settings(self):
+        old = make_password("pw")
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            encoded = make_password("pw")
+            self.assertTrue(encoded.startswith("pbkdf2_sha256$2000$"))
+            # Старый хэш подходит и будет пересчитан при входе.
+            self.assertTrue(check_password("pw", old))
+            self.assertTrue(get_hasher().must_update(old))
+        # А более стойкий хэш не ослабляется до текущих 1000 итераций.
+        self.assertFalse(get_hasher().must_update(encoded))
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_login_does_not_downgrade_hash(self):
+        user = User.objects.create(username="strong")
+        user.password = make_password("pw")
+        user.save()
+        with self.settings(PASSWORD_HASH_ITERATIONS=500):
+            self.assertTrue(
+                self.client.login(username="strong", password="pw")
+            )
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
@@ -1,4 +1,4 @@
-from django.core.mail import BadHeaderError, send_mail
+from django.core.mail import BadHeaderError
 from django.http import HttpResponse
 from django.shortcuts import render
 # Функция reverse_lazy позволяет получить URL по параметрам функции path()
@@ -8,6 +8,7 @@ from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
 # Импортируем класс формы, чтобы сослаться на неё во view-классе
+from . import outbox
 from .forms import CreationForm
 
 
@@ -25,12 +26,16 @@ def password_reset_form(request):
     #     "agkuban@mail.ru",
     #     ["Djoknakh@yandex.ru"],
     # )
-    subject = request.POST.get("subject", "")
-    message = request.POST.get("message", "")
-    from_email = request.POST.get("from_email", "")
-    try:
-        send_mail(subject, message, from_email, ["admin@example.com"])
-    except BadHeaderError:
-        return HttpResponse("Invalid header found.")
+    if request.method == "POST":
+        subject = request.POST.get("subject", "")
+        message = request.POST.get("message", "")
+        from_email = request.POST.get("from_email", "")
+        # Письмо отправит команда send_queued_mail, ответ не ждёт SMTP.
+        try:
+            outbox.enqueue(
+                subject, message, from_email, ["admin@example.com"]
+            )
+        except BadHeaderError:
+            return HttpResponse("Invalid header found.")
 
     return render(request, "users/password_reset_form.html")
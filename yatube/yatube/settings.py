@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -46,9 +47,14 @@ INSTALLED_APPS = [
     "users.apps.UsersConfig",
     "core.apps.CoreConfig",
     "about.apps.AboutConfig",
+    "sorl.thumbnail",
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы время запроса включало остальные middleware.
+    "core.middleware.MetricsMiddleware",
+    # До сессий: запись сессии тоже закрепляет браузер за default.
+    "core.middleware.DatabaseRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -63,7 +69,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates с замером времени рендеринга для /metrics.
+        "BACKEND": "core.template_backends.TimedDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -73,24 +80,187 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processor.сurrent_date",
+                "core.context_processor.fragment_cache",
             ],
         },
     },
 ]
 
+# Разобранные шаблоны держит в памяти cached loader, а wsgi.py прогревает
+# их при старте. По умолчанию включено без DEBUG: с кэшем правки
+# шаблонов видны только после перезапуска.
+TEMPLATE_CACHE = os.environ.get(
+    "TEMPLATE_CACHE", "0" if DEBUG else "1"
+) == "1"
+if TEMPLATE_CACHE:
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+
+# Таймаут кэша фрагментов шапки и подвала; 0 отключает кэширование.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
 WSGI_APPLICATION = "yatube.wsgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# База настраивается переменными окружения. DB_ENGINE принимает короткие
+# имена из DB_ENGINES или полный путь к бэкенду, например
+# django.db.backends.sqlite3 для SQLite без пула и PRAGMA.
+DB_ENGINES = {
+    "sqlite3": "core.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+}
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite3")
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "ENGINE": DB_ENGINES.get(DB_ENGINE, DB_ENGINE),
+        "NAME": os.environ.get(
+            "DB_NAME", os.path.join(BASE_DIR, "db.sqlite3")
+        ),
+        "USER": os.environ.get("DB_USER", ""),
+        "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+        "HOST": os.environ.get("DB_HOST", ""),
+        "PORT": os.environ.get("DB_PORT", ""),
+        # Постоянные соединения: одно на поток, живёт CONN_MAX_AGE секунд.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "OPTIONS": {},
     }
 }
 
+if DATABASES["default"]["ENGINE"] == DB_ENGINES["sqlite3"]:
+    DATABASES["default"]["OPTIONS"] = {
+        # busy timeout в секундах: писатель ждёт блокировку, а не падает.
+        "timeout": float(os.environ.get("DB_BUSY_TIMEOUT", 20)),
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 8)),
+        "pragmas": {
+            "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+            "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        },
+    }
+    # Тестовая база в памяти, как у встроенного бэкенда. Имя задано явно:
+    # иначе pytest-django под xdist дописывает суффикс воркера к пути
+    # DB_NAME, потому что не узнаёт наш ENGINE как SQLite.
+    DATABASES["default"]["TEST"] = {"NAME": ":memory:"}
+
+# Тесты: база создаётся копией шаблона из TEST_DB_TEMPLATE_DIR (пустое
+# значение отключает шаблоны, см. core.db.backends.sqlite3.creation), а
+# manage.py test идёт в TEST_PROCESSES процессах (0 — по числу ядер).
+# Параллельный прогон Django 2.2 работает только с fork: без него тесты
+# всегда идут в одном процессе. pytest распараллеливает pytest-xdist.
+TEST_DB_TEMPLATE_DIR = os.environ.get(
+    "TEST_DB_TEMPLATE_DIR",
+    os.path.join(tempfile.gettempdir(), "yatube-test-db"),
+)
+TEST_PROCESSES = int(os.environ.get("TEST_PROCESSES", 0))
+TEST_RUNNER = "core.test_runner.TimedParallelRunner"
+
+# Реплики только для чтения: DB_REPLICAS — через запятую пути к файлам
+# для SQLite или хосты для остальных бэкендов, прочие параметры как у
+# default. Реплики читают view из DB_REPLICA_VIEWS, а после записи
+# браузер DB_PRIMARY_PIN_SECONDS секунд читает с default.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.environ.get("DB_REPLICAS", "").split(",")), start=1
+):
+    alias = f"replica{number}"
+    key = "NAME" if "sqlite3" in DATABASES["default"]["ENGINE"] else "HOST"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        key: replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["core.db.router.PrimaryReplicaRouter"]
+DB_REPLICA_VIEWS = [
+    "posts:index",
+    "posts:group_list",
+    "posts:profile",
+    "posts:post_detail",
+]
+DB_PRIMARY_PIN_SECONDS = 10
+
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Кэш отрисованных лент (posts.feed_cache). Подходит любой алиас из CACHES,
+# например filebased; таймаут 0 отключает кэширование.
+FEED_CACHE_ALIAS = "default"
+FEED_CACHE_TIMEOUT = 60 * 5
+
+# Группы по слагу кэшируются в памяти процесса (posts.groups): сколько
+# секунд живёт запись и сколько слагов помнится; таймаут 0 отключает кэш.
+GROUP_CACHE_TIMEOUT = 60
+GROUP_CACHE_SIZE = 10_000
+
+# Лента подписок (posts.timeline): сколько последних постов хранится на
+# пользователя и с какого числа подписчиков посты автора или группы не
+# раздаются по лентам, а читаются при показе.
+TIMELINE_SIZE = 800
+TIMELINE_FANOUT_LIMIT = 10_000
+
+# Приём постов (posts.submissions): сколько живёт ключ от повторной
+# отправки формы, ведро токенов на пользователя (постов в минуту, 0
+# отключает ограничение, и запас подряд) и отложенная запись через
+# очередь, которую разбирает команда drain_posts.
+POST_IDEMPOTENCY_TTL = 60 * 60
+POST_RATE_LIMIT = int(os.environ.get("POST_RATE_LIMIT", 20))
+POST_RATE_LIMIT_BURST = 10
+POST_WRITE_BEHIND = os.environ.get("POST_WRITE_BEHIND", "0") == "1"
+POST_WRITE_BATCH_SIZE = 200
+
+# Архив (posts.archive): посты старше стольких дней команда archive_posts
+# переносит из Post в ArchivedPost пачками по POST_ARCHIVE_BATCH_SIZE.
+POST_ARCHIVE_AFTER_DAYS = 365
+POST_ARCHIVE_BATCH_SIZE = 1000
+
+# /metrics доступен персоналу; сборщик Prometheus может вместо этого
+# передать заголовок "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
+# Сессии: SESSION_ENGINE — короткое имя из SESSION_ENGINES или полный
+# путь к бэкенду. cached_db и cache читают сессию из кэша без запроса к
+# базе, signed_cookies хранит её в подписанной cookie. Кэш сессий и
+# пользователей (AUTH_USER_CACHE_TIMEOUT, 0 отключает) имеет смысл
+# включать с общим для процессов кэшем, например Memcached: с locmem
+# выход и смена пароля видны только в своём процессе.
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", "db")
+SESSION_ENGINE = SESSION_ENGINES.get(SESSION_ENGINE, SESSION_ENGINE)
+AUTHENTICATION_BACKENDS = ["users.backends.CachedModelBackend"]
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 0))
+
+# Стоимость хэша пароля при регистрации и входе, как в Django 2.2. Хэши
+# с меньшим числом итераций пересчитываются при входе, с большим — нет.
+# Меньшие значения задают только тесты и benchmarks/auth_throughput.py.
+PASSWORD_HASH_ITERATIONS = 150_000
+PASSWORD_HASHERS = [
+    "users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -138,7 +308,52 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 # было smtp.EmailBackend
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Очередь исходящей почты (users.outbox): писем за одно соединение,
+# число попыток и базовая задержка повтора в секундах.
+MAIL_OUTBOX_BATCH_SIZE = 100
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+MAIL_OUTBOX_BACKOFF = 60
+
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
+STATIC_ROOT = os.environ.get(
+    "STATIC_ROOT", os.path.join(BASE_DIR, "collected_static")
+)
+
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
+
+# Адаптивные картинки (core.images): ширины миниатюр и атрибут sizes для
+# каждого пресета. Миниатюры в исходном формате и в WebP нарезает команда
+# generate_thumbnails, их адреса sorl хранит в кэше и в базе.
+THUMBNAIL_BACKEND = "core.images.ThumbnailBackend"
+THUMBNAIL_KVSTORE = "core.images.KVStore"
+# Сколько секунд помнить, что миниатюр картинки ещё нет.
+THUMBNAIL_MISS_TIMEOUT = 60
+THUMBNAIL_PRESERVE_FORMAT = True
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_PRESETS = {
+    "logo": {"widths": [30, 60, 90], "sizes": "30px"},
+    "post": {
+        "widths": [320, 640, 960],
+        "sizes": "(max-width: 700px) 100vw, 640px",
+    },
+}
+# Картинки из статики, для которых команда тоже нарезает миниатюры.
+THUMBNAIL_STATIC_IMAGES = {"img/logo.png": "logo"}
+
+# Продакшен-статика: collectstatic чистит CSS от неиспользуемых
+# селекторов, добавляет хэши к именам и сжимает файлы, а wsgi.py отдаёт
+# их из STATIC_ROOT с immutable-кэшированием (core.static_wsgi).
+STATIC_PIPELINE = os.environ.get(
+    "STATIC_PIPELINE", "0" if DEBUG else "1"
+) == "1"
+if STATIC_PIPELINE:
+    STATICFILES_STORAGE = (
+        "core.staticfiles.CompressedManifestStaticFilesStorage"
+    )
+STATIC_PURGE_CSS = ["css/bootstrap.min.css"]
+# Классы, которые не встречаются в шаблонах, но должны остаться.
+STATIC_PURGE_SAFELIST = ["active", "show"]
 
 # EMAIL_HOST = "smtp.mail.ru"
 # EMAIL_PORT = "465"
@@ -1,10 +1,21 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include(("posts.urls", "posts"), namespace="posts")),
+    path("api/v1/", include("posts.api_urls", namespace="api")),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path("about/", include("about.urls", namespace="about")),
+    path("metrics", metrics, name="metrics"),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+    )
@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.TEMPLATE_CACHE:
+    from core.template_backends import warm_up  # noqa: E402
+
+    warm_up()
+
+if settings.STATIC_PIPELINE and os.path.isdir(settings.STATIC_ROOT):
+    from core.static_wsgi import StaticFilesApp  # noqa: E402
+
+    application = StaticFilesApp(application)